@@ -1,9 +1,11 @@
 """
 Application configuration using Pydantic Settings
 """
-from pydantic import Field
+import hashlib
+from functools import cached_property
+from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import FrozenSet, List
 
 
 class Settings(BaseSettings):
@@ -44,6 +46,9 @@ class Settings(BaseSettings):
     nextcloud_base_path: str = "/nodeo"
     nextcloud_auto_sync: bool = True  # Auto-sync on project assignment
     nextcloud_sync_strategy: str = "mirror"  # mirror | backup | primary
+    nextcloud_sync_concurrency: int = 8  # max concurrent uploads per project/batch sync
+    nextcloud_bulk_upload: bool = True  # use the bulk upload endpoint for small files
+    nextcloud_bulk_threshold: int = 10 * 1024 * 1024  # max file size sent via bulk upload
 
     # Cloudflare
     cloudflare_account_id: str = ""
@@ -69,6 +74,7 @@ class Settings(BaseSettings):
     enable_cloudflare_r2: bool = False
     enable_cloudflare_stream: bool = False
     enable_manifest_generation: bool = False
+    manifest_hash_algorithm: str = "sha256"  # any hashlib algorithm, e.g. blake2b
 
     # Storage
     storage_root: str = "/app/storage"
@@ -85,6 +91,7 @@ class Settings(BaseSettings):
     # Processing
     max_batch_size: int = 50
     process_timeout_seconds: int = 300
+    media_probe_concurrency: int = 4  # max concurrent ffprobe/magick processes
 
     # v2 - Folder Monitoring
     watcher_scan_interval: int = 60  # seconds between rescans
@@ -94,20 +101,35 @@ class Settings(BaseSettings):
     activity_log_retention_days: int = 90  # auto-cleanup old logs
     max_batch_size_v2: int = 50  # max items for batch operations
 
-    @property
-    def allowed_image_exts(self) -> List[str]:
-        """Get allowed image extensions as list"""
-        return [ext.strip().lower() for ext in self.allowed_image_extensions.split(",")]
-
-    @property
-    def allowed_video_exts(self) -> List[str]:
-        """Get allowed video extensions as list"""
-        return [ext.strip().lower() for ext in self.allowed_video_extensions.split(",")]
-
-    @property
-    def watcher_allowed_exts(self) -> List[str]:
-        """Get allowed file extensions for folder watcher as list"""
-        return [ext.strip().lower() for ext in self.watcher_file_extensions.split(",")]
+    @field_validator("manifest_hash_algorithm")
+    @classmethod
+    def validate_manifest_hash_algorithm(cls, value: str) -> str:
+        """Reject unknown algorithms and shake_* (their hexdigest needs a length)"""
+        algorithm = value.strip().lower()
+        if algorithm not in hashlib.algorithms_available or algorithm.startswith("shake_"):
+            raise ValueError(f"Unsupported manifest hash algorithm: {value}")
+        return algorithm
+
+    # Extension sets are parsed once, not on every membership test
+    @cached_property
+    def allowed_image_exts(self) -> FrozenSet[str]:
+        """Get allowed image extensions as a set"""
+        return frozenset(ext.strip().lower() for ext in self.allowed_image_extensions.split(","))
+
+    @cached_property
+    def allowed_video_exts(self) -> FrozenSet[str]:
+        """Get allowed video extensions as a set"""
+        return frozenset(ext.strip().lower() for ext in self.allowed_video_extensions.split(","))
+
+    @cached_property
+    def allowed_media_exts(self) -> FrozenSet[str]:
+        """Get allowed image and video extensions as a set"""
+        return self.allowed_image_exts | self.allowed_video_exts
+
+    @cached_property
+    def watcher_allowed_exts(self) -> FrozenSet[str]:
+        """Get allowed file extensions for folder watcher as a set"""
+        return frozenset(ext.strip().lower() for ext in self.watcher_file_extensions.split(","))
 
 
 # Global settings instance
@@ -1,6 +1,6 @@
 """Service modules"""
 from app.services.metadata_service import MetadataService, metadata_service, AssetType
-from app.services.template_parser import TemplateParser, PREDEFINED_TEMPLATES
+from app.services.template_parser import TemplateParser, PREDEFINED_TEMPLATES, get_parser
 from app.services.rename_engine import RenameEngine
 from app.services.media_metadata import MediaMetadataService, MediaMetadataResult
 from app.services.grouping import GroupingService, GroupSummary
@@ -8,6 +8,7 @@ from app.services.grouping import GroupingService, GroupSummary
 __all__ = [
     "TemplateParser",
     "PREDEFINED_TEMPLATES",
+    "get_parser",
     "RenameEngine",
     "MediaMetadataService",
     "MediaMetadataResult",
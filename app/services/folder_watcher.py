@@ -3,6 +3,7 @@ Folder watcher service for monitoring filesystem changes and triggering analysis
 """
 import asyncio
 import logging
+import os
 from pathlib import Path
 from typing import Dict, Optional, Set
 from datetime import datetime
@@ -20,6 +21,14 @@ from app.config import settings
 logger = logging.getLogger(__name__)
 
 
+def _is_media_name(name: str) -> bool:
+    """Check a file name (not a path) against the allowed media extensions"""
+    if name.startswith('.'):
+        return False
+    _, dot, ext = name.rpartition('.')
+    return bool(dot) and ext.lower() in settings.allowed_media_exts
+
+
 class FolderEventHandler(FileSystemEventHandler):
     """Handler for filesystem events in watched folders"""
 
@@ -27,15 +36,11 @@ class FolderEventHandler(FileSystemEventHandler):
         self.folder_id = folder_id
         self.folder_path = folder_path
         self.manager = manager
-        self.allowed_extensions = set(
-            settings.allowed_image_exts + settings.allowed_video_exts
-        )
+        self.allowed_extensions = settings.allowed_media_exts
 
     def _is_valid_file(self, file_path: str) -> bool:
         """Check if file is a valid media file"""
-        path = Path(file_path)
-        ext = path.suffix.lower().lstrip('.')
-        return ext in self.allowed_extensions and not path.name.startswith('.')
+        return _is_media_name(os.path.basename(file_path))
 
     def on_created(self, event):
         """Handle file creation events"""
@@ -250,16 +255,10 @@ class WatcherManager:
                     await self.set_folder_error(folder_id, "Folder does not exist")
                     return
 
-                allowed_exts = set(
-                    settings.allowed_image_exts + settings.allowed_video_exts
-                )
-
                 files = []
                 for file_path in path.rglob('*'):
-                    if file_path.is_file():
-                        ext = file_path.suffix.lower().lstrip('.')
-                        if ext in allowed_exts and not file_path.name.startswith('.'):
-                            files.append(str(file_path))
+                    if _is_media_name(file_path.name) and file_path.is_file():
+                        files.append(str(file_path))
 
                 # Update file count
                 folder.file_count = len(files)
@@ -59,7 +59,7 @@ class GroupingService:
             query = query.where(ImageGroup.group_type == group_type)
 
         result = await self.db.execute(query)
-        groups = result.scalars().unique().all()
+        groups = result.scalars().all()
 
         summaries: List[GroupSummary] = []
         for group in groups:
@@ -248,7 +248,7 @@ class GroupingService:
             .options(selectinload(ImageGroup.assignments))
             .where(ImageGroup.group_type == group_type)
         )
-        existing_groups = result.scalars().unique().all()
+        existing_groups = result.scalars().all()
         existing_by_key = {
             (group.attributes or {}).get("cluster_key"): group for group in existing_groups
         }
@@ -4,18 +4,30 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
-from dataclasses import asdict, dataclass
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, replace
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models import MediaMetadata, MediaType
 
 logger = logging.getLogger(__name__)
 
+# In-process cache of normalized metadata keyed by (path, mtime_ns, size);
+# sits in front of the database cache so repeat lookups skip the query
+PROBE_CACHE_SIZE = 1024
+
+_probe_cache: "OrderedDict[Tuple[str, int, int], MediaMetadataResult]" = OrderedDict()
+
+# Probe subprocesses are shared across all requests; bound how many run at once
+_probe_semaphore = asyncio.Semaphore(max(1, settings.media_probe_concurrency))
+
 
 @dataclass
 class MediaMetadataResult:
@@ -58,13 +70,22 @@ class MediaMetadataService:
         """
 
         path = Path(file_path)
-        if not path.exists():
+        try:
+            stat = path.stat()
+        except OSError:
             raise FileNotFoundError(f"Media file does not exist: {file_path}")
 
-        file_mtime = path.stat().st_mtime
+        file_mtime = stat.st_mtime
+        cache_key = (str(path), stat.st_mtime_ns, stat.st_size)
+
+        hit = _probe_cache.get(cache_key)
+        if hit is not None:
+            _probe_cache.move_to_end(cache_key)
+            return replace(hit)
 
         cached = await self._get_cached(path, file_mtime)
         if cached:
+            self._remember(cache_key, cached)
             return cached
 
         media_type = self._guess_media_type(path, mime_type)
@@ -77,8 +98,16 @@ class MediaMetadataService:
         normalized = self._normalize_metadata(raw_metadata, media_type, path, file_mtime)
         record = await self._store_metadata(normalized, raw_metadata)
         normalized.metadata_id = record.id if record else None
+        self._remember(cache_key, normalized)
         return normalized
 
+    @staticmethod
+    def _remember(cache_key: Tuple[str, int, int], result: MediaMetadataResult) -> None:
+        """Store a copy of a result in the in-process cache, evicting the oldest"""
+        _probe_cache[cache_key] = replace(result)
+        if len(_probe_cache) > PROBE_CACHE_SIZE:
+            _probe_cache.popitem(last=False)
+
     async def _get_cached(
         self, path: Path, file_mtime: float
     ) -> Optional[MediaMetadataResult]:
@@ -104,42 +133,39 @@ class MediaMetadataService:
 
     async def _store_metadata(
         self, normalized: MediaMetadataResult, raw_metadata: Dict[str, Any]
-    ) -> Optional[MediaMetadata]:
-        stmt = select(MediaMetadata).where(MediaMetadata.file_path == normalized.file_path)
-        result = await self.db.execute(stmt)
-        record = result.scalar_one_or_none()
+    ) -> MediaMetadata:
+        # One INSERT ... ON CONFLICT round trip instead of SELECT then
+        # INSERT/UPDATE; the unique file_path makes it race-safe
         now = datetime.utcnow()
-
-        if record:
-            record.file_mtime = normalized.file_mtime or record.file_mtime
-            record.media_type = MediaType(normalized.media_type)
-            record.width = normalized.width
-            record.height = normalized.height
-            record.duration_s = normalized.duration_s
-            record.frame_rate = normalized.frame_rate
-            record.codec = normalized.codec
-            record.media_format = normalized.format
-            record.raw_metadata = raw_metadata
-            record.updated_at = now
-        else:
-            record = MediaMetadata(
-                file_path=normalized.file_path,
-                file_mtime=normalized.file_mtime or 0.0,
-                media_type=MediaType(normalized.media_type),
-                width=normalized.width,
-                height=normalized.height,
-                duration_s=normalized.duration_s,
-                frame_rate=normalized.frame_rate,
-                codec=normalized.codec,
-                media_format=normalized.format,
-                raw_metadata=raw_metadata,
-                created_at=now,
-                updated_at=now,
-            )
-            self.db.add(record)
-
-        await self.db.flush()
-        return record
+        values = {
+            "file_path": normalized.file_path,
+            "file_mtime": normalized.file_mtime or 0.0,
+            "media_type": MediaType(normalized.media_type),
+            "width": normalized.width,
+            "height": normalized.height,
+            "duration_s": normalized.duration_s,
+            "frame_rate": normalized.frame_rate,
+            "codec": normalized.codec,
+            "media_format": normalized.format,
+            "raw_metadata": raw_metadata,
+            "created_at": now,
+            "updated_at": now,
+        }
+        stmt = insert(MediaMetadata).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MediaMetadata.file_path],
+            set_={
+                name: stmt.excluded[name]
+                for name in values
+                if name not in ("file_path", "created_at")
+            },
+        )
+        # populate_existing refreshes a stale copy already in the session
+        result = await self.db.execute(
+            stmt.returning(MediaMetadata),
+            execution_options={"populate_existing": True},
+        )
+        return result.scalar_one()
 
     def _guess_media_type(self, path: Path, mime_type: Optional[str]) -> str:
         if mime_type:
@@ -204,9 +230,7 @@ class MediaMetadataService:
             "-select_streams",
             "v:0",
             "-show_entries",
-            "stream=width,height,r_frame_rate,codec_name",
-            "-show_entries",
-            "format=duration,format_name",
+            "stream=width,height,r_frame_rate,codec_name:format=duration,format_name",
             "-of",
             "json",
             str(path),
@@ -242,10 +266,11 @@ class MediaMetadataService:
         }
 
     async def _run_command(self, cmd: list[str]) -> str:
-        process = await asyncio.create_subprocess_exec(
-            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-        )
-        stdout, stderr = await process.communicate()
+        async with _probe_semaphore:
+            process = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+            stdout, stderr = await process.communicate()
         if process.returncode != 0:
             stderr_text = stderr.decode().strip()
             raise RuntimeError(f"Command {' '.join(cmd)} failed: {stderr_text}")
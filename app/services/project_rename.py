@@ -12,7 +12,7 @@ from sqlalchemy.orm import selectinload
 
 from app.models import Image, Project
 from app.services.rename_engine import RenameEngine
-from app.services.template_parser import TemplateParser
+from app.services.template_parser import get_parser
 
 logger = logging.getLogger(__name__)
 
@@ -143,7 +143,7 @@ class ProjectRenameService:
         images = sorted(project.images, key=lambda img: img.created_at)
 
         # Create parser
-        parser = TemplateParser(template)
+        parser = get_parser(template)
 
         # Generate previews
         previews = []
@@ -290,7 +290,7 @@ class ProjectRenameService:
         )
 
         # Generate filename
-        parser = TemplateParser(template)
+        parser = get_parser(template)
         ext = Path(image.current_filename).suffix
         proposed_base = parser.apply(metadata)
         proposed_filename = f"{proposed_base}{ext}"
@@ -366,7 +366,7 @@ class ProjectRenameService:
         suggestions = []
         for name, template in PREDEFINED_TEMPLATES.items():
             if name.startswith("portfolio_"):
-                parser = TemplateParser(template)
+                parser = get_parser(template)
                 ext = Path(sample_image.current_filename).suffix
                 preview = parser.apply(sample_metadata)
                 suggestions.append(
@@ -1,10 +1,13 @@
 """Project management service for portfolio organization"""
 from __future__ import annotations
 
+import asyncio
+import logging
+import time
 from datetime import datetime
-from typing import Dict, List, Optional, Sequence, TYPE_CHECKING
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
 
-from sqlalchemy import select
+from sqlalchemy import delete, exists, func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -13,6 +16,7 @@ from app.models import (
     Image,
     ImageGroup,
     ImageGroupAssociation,
+    MediaType,
     Project,
     ProjectType,
 )
@@ -21,10 +25,26 @@ from app.storage.layout import _slugify_segment
 if TYPE_CHECKING:
     from app.storage.nextcloud_sync import NextcloudSyncService
 
+logger = logging.getLogger(__name__)
+
+# Seconds a slug -> project ID resolution stays cached
+SLUG_CACHE_TTL = 30.0
+
+_slug_cache: Dict[str, Tuple[int, float]] = {}
+
+
+def _invalidate_slug_cache(project_id: int) -> None:
+    """Drop cached slug resolutions pointing at a project"""
+    for slug in [slug for slug, (pid, _) in _slug_cache.items() if pid == project_id]:
+        _slug_cache.pop(slug, None)
+
 
 class ProjectService:
     """Service for managing portfolio projects and asset assignments"""
 
+    # Maximum concurrent Nextcloud syncs after an assignment
+    SYNC_CONCURRENCY = 8
+
     def __init__(
         self,
         db: AsyncSession,
@@ -70,11 +90,7 @@ class ProjectService:
         slug = _slugify_segment(name)
 
         # Check if slug already exists
-        result = await self.db.execute(
-            select(Project).where(Project.slug == slug)
-        )
-        existing = result.scalar_one_or_none()
-        if existing:
+        if await self.db.scalar(select(exists().where(Project.slug == slug))):
             raise ValueError(f"Project with slug '{slug}' already exists")
 
         # Auto-generate Nextcloud folder if not provided
@@ -102,29 +118,58 @@ class ProjectService:
         return project
 
     async def get_project(self, project_id: int) -> Optional[Project]:
-        """Get project by ID with relationships loaded"""
+        """Get project by ID with its images loaded (for detail views)"""
         result = await self.db.execute(
             select(Project)
-            .options(selectinload(Project.images), selectinload(Project.groups))
+            .options(selectinload(Project.images))
             .where(Project.id == project_id)
         )
         return result.scalar_one_or_none()
 
+    async def get_project_bare(self, project_id: int) -> Optional[Project]:
+        """
+        Get project by ID without loading relationships (for mutators)
+
+        Uses the session identity map, so repeated lookups within the same
+        session do not hit the database again.
+        """
+        return await self.db.get(Project, project_id)
+
     async def get_project_by_slug(self, slug: str) -> Optional[Project]:
-        """Get project by slug"""
-        result = await self.db.execute(
-            select(Project)
-            .options(selectinload(Project.images), selectinload(Project.groups))
-            .where(Project.slug == slug)
+        """
+        Get project by slug
+
+        Slug -> ID resolutions are cached for SLUG_CACHE_TTL seconds; the
+        row itself is always loaded through the session.
+        """
+        now = time.monotonic()
+        hit = _slug_cache.get(slug)
+        if hit and hit[1] > now:
+            project = await self.db.get(Project, hit[0])
+            if project and project.slug == slug:
+                return project
+            _slug_cache.pop(slug, None)
+
+        project = await self.db.scalar(
+            select(Project).where(Project.slug == slug)
         )
-        return result.scalar_one_or_none()
+        if project:
+            _slug_cache[slug] = (project.id, now + SLUG_CACHE_TTL)
+        return project
+
+    async def count_project_images(self, project_id: int) -> int:
+        """Count images assigned to a project"""
+        count = await self.db.scalar(
+            select(func.count(Image.id)).where(Image.project_id == project_id)
+        )
+        return count or 0
 
     async def list_projects(
         self,
         project_type: Optional[ProjectType] = None,
         is_active: Optional[bool] = None,
         featured_only: bool = False,
-    ) -> List[Project]:
+    ) -> List[Tuple[Project, int, int]]:
         """
         List all projects with optional filtering
 
@@ -134,11 +179,23 @@ class ProjectService:
             featured_only: Only return featured projects
 
         Returns:
-            List of projects
+            List of (project, image_count, group_count) tuples
         """
-        query = select(Project).options(
-            selectinload(Project.images), selectinload(Project.groups)
+        image_count = (
+            select(func.count(Image.id))
+            .where(Image.project_id == Project.id)
+            .correlate(Project)
+            .scalar_subquery()
+            .label("image_count")
+        )
+        group_count = (
+            select(func.count(ImageGroup.id))
+            .where(ImageGroup.project_id == Project.id)
+            .correlate(Project)
+            .scalar_subquery()
+            .label("group_count")
         )
+        query = select(Project, image_count, group_count)
 
         if project_type:
             query = query.where(Project.project_type == project_type)
@@ -152,7 +209,7 @@ class ProjectService:
         query = query.order_by(Project.created_at.desc())
 
         result = await self.db.execute(query)
-        return list(result.scalars().unique().all())
+        return [tuple(row) for row in result.all()]
 
     async def update_project(
         self,
@@ -169,7 +226,7 @@ class ProjectService:
         Returns:
             Updated project
         """
-        project = await self.get_project(project_id)
+        project = await self.get_project_bare(project_id)
         if not project:
             raise ValueError(f"Project {project_id} not found")
 
@@ -179,7 +236,9 @@ class ProjectService:
                 setattr(project, key, value)
 
         await self.db.commit()
-        await self.db.refresh(project)
+        _invalidate_slug_cache(project_id)
+        # updated_at is set server-side on update; reload just that column
+        await self.db.refresh(project, attribute_names=["updated_at"])
         return project
 
     async def delete_project(self, project_id: int) -> bool:
@@ -192,13 +251,14 @@ class ProjectService:
         Returns:
             True if successful
         """
-        project = await self.get_project(project_id)
+        project = await self.get_project_bare(project_id)
         if not project:
             return False
 
         # Set as inactive instead of deleting
         project.is_active = False
         await self.db.commit()
+        _invalidate_slug_cache(project_id)
         return True
 
     async def assign_images_to_project(
@@ -206,7 +266,7 @@ class ProjectService:
         project_id: int,
         image_ids: Sequence[int],
         replace: bool = False,
-    ) -> Project:
+    ) -> Tuple[Project, List[int]]:
         """
         Assign images to a project
 
@@ -216,9 +276,10 @@ class ProjectService:
             replace: If True, remove existing assignments first
 
         Returns:
-            Updated project
+            (updated project, IDs of images whose Nextcloud sync failed),
+            so callers can retry those images
         """
-        project = await self.get_project(project_id)
+        project = await self.get_project_bare(project_id)
         if not project:
             raise ValueError(f"Project {project_id} not found")
 
@@ -242,22 +303,51 @@ class ProjectService:
                 newly_assigned_ids.append(image_id)
 
         await self.db.commit()
-        await self.db.refresh(project)
 
         # Trigger Nextcloud sync if available
+        sync_failed_ids: List[int] = []
         if self.sync_service and newly_assigned_ids:
-            for image_id in newly_assigned_ids:
+            sync_failed_ids = await self._sync_assigned_images(project_id, newly_assigned_ids)
+
+        return project, sync_failed_ids
+
+    async def _sync_assigned_images(
+        self,
+        project_id: int,
+        image_ids: Sequence[int],
+    ) -> List[int]:
+        """
+        Sync newly assigned images to Nextcloud with bounded concurrency
+
+        Failures never fail the assignment; they are logged and returned.
+
+        Returns:
+            IDs of images that failed to sync
+        """
+        semaphore = asyncio.Semaphore(self.SYNC_CONCURRENCY)
+
+        async def _sync(image_id: int) -> Optional[int]:
+            async with semaphore:
                 try:
-                    await self.sync_service.sync_image_on_assignment(
+                    result = await self.sync_service.sync_image_on_assignment(
                         image_id=image_id,
                         project_id=project_id,
                     )
                 except Exception as e:
-                    # Log but don't fail the assignment
-                    import logging
-                    logging.warning(f"Failed to sync image {image_id} to Nextcloud: {e}")
-
-        return project
+                    logger.warning(f"Failed to sync image {image_id} to Nextcloud: {e}")
+                    return image_id
+            if result is not None and not result.success:
+                return image_id
+            return None
+
+        results = await asyncio.gather(*(_sync(image_id) for image_id in image_ids))
+        failed = [image_id for image_id in results if image_id is not None]
+        if failed:
+            logger.warning(
+                f"Nextcloud sync failed for {len(failed)}/{len(image_ids)} images "
+                f"in project {project_id}: {failed}"
+            )
+        return failed
 
     async def remove_images_from_project(
         self,
@@ -274,7 +364,7 @@ class ProjectService:
         Returns:
             Updated project
         """
-        project = await self.get_project(project_id)
+        project = await self.get_project_bare(project_id)
         if not project:
             raise ValueError(f"Project {project_id} not found")
 
@@ -290,14 +380,34 @@ class ProjectService:
                 image.project_id = None
 
         await self.db.commit()
-        await self.db.refresh(project)
         return project
 
-    async def get_unassigned_images(self) -> List[Image]:
-        """Get all images not assigned to any project"""
-        result = await self.db.execute(
-            select(Image).where(Image.project_id.is_(None))
+    async def iter_unassigned_images(self) -> AsyncIterator[Image]:
+        """Stream images not assigned to any project via a server-side cursor"""
+        result = await self.db.stream_scalars(
+            select(Image)
+            .where(Image.project_id.is_(None))
+            .execution_options(yield_per=500)
         )
+        async for image in result:
+            yield image
+
+    async def get_unassigned_images(self, limit: Optional[int] = None) -> List[Image]:
+        """
+        Get images not assigned to any project
+
+        Prefer iter_unassigned_images() when the caller only iterates.
+
+        Args:
+            limit: Maximum number of images to return (all if None)
+
+        Returns:
+            List of unassigned images
+        """
+        query = select(Image).where(Image.project_id.is_(None))
+        if limit is not None:
+            query = query.limit(limit)
+        result = await self.db.execute(query)
         return list(result.scalars().all())
 
     async def get_project_stats(self, project_id: int) -> Dict:
@@ -310,30 +420,39 @@ class ProjectService:
         Returns:
             Dictionary with project statistics
         """
-        project = await self.get_project(project_id)
+        project = await self.get_project_bare(project_id)
         if not project:
             raise ValueError(f"Project {project_id} not found")
 
-        # Count images
-        result = await self.db.execute(
-            select(Image).where(Image.project_id == project_id)
+        # Aggregate totals server-side
+        totals = await self.db.execute(
+            select(
+                func.count(Image.id),
+                func.count(Image.analyzed_at),
+                func.coalesce(func.sum(Image.file_size), 0),
+            ).where(Image.project_id == project_id)
         )
-        images = list(result.scalars().all())
-
-        # Calculate stats
-        total_images = len(images)
-        analyzed_images = sum(1 for img in images if img.analyzed_at)
-        total_size = sum(img.file_size for img in images)
+        total_images, analyzed_images, total_size = totals.one()
 
-        # Count by media type
-        image_count = sum(1 for img in images if img.media_type.value == "image")
-        video_count = sum(1 for img in images if img.media_type.value == "video")
+        # Count by media type and storage type
+        breakdown = await self.db.execute(
+            select(Image.media_type, Image.storage_type, func.count(Image.id))
+            .where(Image.project_id == project_id)
+            .group_by(Image.media_type, Image.storage_type)
+        )
 
-        # Count by storage type
+        image_count = 0
+        video_count = 0
         storage_counts = {}
-        for img in images:
-            storage_type = img.storage_type.value
-            storage_counts[storage_type] = storage_counts.get(storage_type, 0) + 1
+        for media_type, storage_type, count in breakdown:
+            if media_type == MediaType.IMAGE:
+                image_count += count
+            elif media_type == MediaType.VIDEO:
+                video_count += count
+            if storage_type is not None:
+                storage_counts[storage_type.value] = (
+                    storage_counts.get(storage_type.value, 0) + count
+                )
 
         return {
             "project_id": project_id,
@@ -358,15 +477,13 @@ class ProjectService:
         Returns:
             Created or updated image group
         """
-        project = await self.get_project(project_id)
+        project = await self.get_project_bare(project_id)
         if not project:
             raise ValueError(f"Project {project_id} not found")
 
         # Check if group already exists
         result = await self.db.execute(
-            select(ImageGroup)
-            .options(selectinload(ImageGroup.assignments))
-            .where(
+            select(ImageGroup).where(
                 ImageGroup.group_type == GroupType.AI_PROJECT_CLUSTER,
                 ImageGroup.project_id == project_id,
             )
@@ -388,26 +505,36 @@ class ProjectService:
             self.db.add(group)
             await self.db.flush()
 
-        # Get all images for this project
+        # Get all image IDs for this project and current group members
         result = await self.db.execute(
-            select(Image).where(Image.project_id == project_id)
+            select(Image.id).where(Image.project_id == project_id)
         )
-        project_images = list(result.scalars().all())
+        target_ids = set(result.scalars().all())
 
-        # Update group membership
-        existing_ids = {assignment.image_id for assignment in group.assignments}
-        target_ids = {img.id for img in project_images}
+        result = await self.db.execute(
+            select(ImageGroupAssociation.image_id).where(
+                ImageGroupAssociation.group_id == group.id
+            )
+        )
+        existing_ids = set(result.scalars().all())
 
         # Add new assignments
-        for image_id in target_ids - existing_ids:
-            self.db.add(
-                ImageGroupAssociation(group_id=group.id, image_id=image_id)
+        to_add = target_ids - existing_ids
+        if to_add:
+            await self.db.execute(
+                insert(ImageGroupAssociation),
+                [{"group_id": group.id, "image_id": image_id} for image_id in to_add],
             )
 
         # Remove old assignments
-        for assignment in list(group.assignments):
-            if assignment.image_id not in target_ids:
-                await self.db.delete(assignment)
+        to_remove = existing_ids - target_ids
+        if to_remove:
+            await self.db.execute(
+                delete(ImageGroupAssociation).where(
+                    ImageGroupAssociation.group_id == group.id,
+                    ImageGroupAssociation.image_id.in_(to_remove),
+                )
+            )
 
         # Update metadata
         group.attributes = {
@@ -3,11 +3,12 @@ File renaming engine with preview and batch operations
 """
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict
 from datetime import datetime
 import logging
-from app.services.template_parser import TemplateParser
+from app.services.template_parser import get_parser
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +16,10 @@ logger = logging.getLogger(__name__)
 class RenameEngine:
     """Engine for file renaming operations"""
 
+    __slots__ = ('template', 'parser')
+
+    MAX_RENAME_WORKERS = 32
+
     def __init__(self, template: str = "{description}_{date}_{index}"):
         """
         Initialize rename engine
@@ -23,7 +28,7 @@ class RenameEngine:
             template: Naming template to use
         """
         self.template = template
-        self.parser = TemplateParser(template)
+        self.parser = get_parser(template)
 
     def generate_filename(
         self,
@@ -68,16 +73,14 @@ class RenameEngine:
                 - metadata
         """
         previews = []
+        base_names = self.parser.apply_many(images_metadata, start_index=start_index)
 
-        for idx, metadata in enumerate(images_metadata, start=start_index):
+        for idx, (metadata, base_name) in enumerate(
+            zip(images_metadata, base_names), start=start_index
+        ):
             original = metadata.get('original_filename', 'unknown.jpg')
-            ext = Path(original).suffix
-
-            new_filename = self.generate_filename(
-                metadata,
-                index=idx,
-                original_extension=ext
-            )
+            ext = Path(original).suffix.lstrip('.')
+            new_filename = f"{base_name}.{ext}" if ext else base_name
 
             previews.append({
                 'original_filename': original,
@@ -138,7 +141,7 @@ class RenameEngine:
             # Create backup if requested
             if create_backup:
                 backup_path = file_path.parent / f".backup_{file_path.name}"
-                shutil.copy2(file_path, backup_path)
+                self._create_backup(file_path, backup_path)
                 result['backup_path'] = str(backup_path)
                 logger.info(f"Created backup: {backup_path}")
 
@@ -156,6 +159,26 @@ class RenameEngine:
                 'error': str(e)
             }
 
+    @staticmethod
+    def _create_backup(file_path: Path, backup_path: Path) -> None:
+        """
+        Create a backup entry for a file about to be renamed
+
+        A hardlink is used when possible: the rename only changes the
+        directory entry, so the backup keeps pointing at the original
+        content without copying any bytes. Falls back to a full copy when
+        hardlinks are unsupported.
+
+        A leftover backup is unlinked first rather than written over: it may
+        be a hardlink to a file renamed earlier, whose content would
+        otherwise be replaced too.
+        """
+        backup_path.unlink(missing_ok=True)
+        try:
+            os.link(file_path, backup_path)
+        except OSError:
+            shutil.copy2(file_path, backup_path)
+
     def apply_batch_rename(
         self,
         rename_specs: List[Dict],
@@ -184,20 +207,26 @@ class RenameEngine:
         results = []
         errors = []
 
-        for spec in rename_specs:
-            result = self.apply_rename(
-                spec['file_path'],
-                spec['new_filename'],
-                create_backup=create_backups
-            )
-
-            results.append(result)
-
-            if not result['success']:
-                errors.append(result)
-                if stop_on_error:
-                    logger.warning("Stopping batch rename due to error")
-                    break
+        # stop_on_error needs each rename to finish before the next starts,
+        # so only batches that run to completion go to the thread pool
+        if not stop_on_error and self._can_rename_concurrently(rename_specs):
+            results = self._apply_renames_concurrently(rename_specs, create_backups)
+            errors = [r for r in results if not r['success']]
+        else:
+            for spec in rename_specs:
+                result = self.apply_rename(
+                    spec['file_path'],
+                    spec['new_filename'],
+                    create_backup=create_backups
+                )
+
+                results.append(result)
+
+                if not result['success']:
+                    errors.append(result)
+                    if stop_on_error:
+                        logger.warning("Stopping batch rename due to error")
+                        break
 
         summary = {
             'total': len(rename_specs),
@@ -213,6 +242,48 @@ class RenameEngine:
 
         return summary
 
+    @staticmethod
+    def _can_rename_concurrently(rename_specs: List[Dict]) -> bool:
+        """
+        Check whether a batch can be renamed in parallel
+
+        Renames are order-dependent when two specs share a target or one
+        spec's target is another spec's source, so those batches stay
+        sequential.
+        """
+        if len(rename_specs) < 2:
+            return False
+
+        sources = set()
+        targets = set()
+        for spec in rename_specs:
+            source = Path(spec['file_path'])
+            target = source.parent / spec['new_filename']
+            if target in targets:
+                return False
+            sources.add(source)
+            targets.add(target)
+
+        return not (sources & targets)
+
+    def _apply_renames_concurrently(
+        self,
+        rename_specs: List[Dict],
+        create_backups: bool
+    ) -> List[Dict]:
+        """Run independent renames on a bounded thread pool, keeping input order"""
+        with ThreadPoolExecutor(
+            max_workers=min(self.MAX_RENAME_WORKERS, len(rename_specs))
+        ) as executor:
+            return list(executor.map(
+                lambda spec: self.apply_rename(
+                    spec['file_path'],
+                    spec['new_filename'],
+                    create_backup=create_backups
+                ),
+                rename_specs
+            ))
+
     def rollback(self, results: List[Dict]) -> Dict:
         """
         Rollback rename operations using backup files
@@ -270,21 +341,34 @@ class RenameEngine:
             'errors': rollback_errors
         }
 
-    def cleanup_backups(self, directory: str):
+    def cleanup_backups(self, directory: str) -> int:
         """
         Remove backup files from directory
 
         Args:
             directory: Directory to clean
-        """
-        dir_path = Path(directory)
-        backup_files = list(dir_path.glob('.backup_*'))
 
-        for backup in backup_files:
-            try:
-                backup.unlink()
-                logger.info(f"Removed backup: {backup}")
-            except Exception as e:
-                logger.error(f"Error removing backup {backup}: {e}")
+        Returns:
+            Number of backup files removed (0 if the directory is missing)
+        """
+        removed = 0
 
-        logger.info(f"Cleaned up {len(backup_files)} backup files")
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
+            logger.info(f"Cleaned up {removed} backup files")
+            return removed
+
+        with entries:
+            for entry in entries:
+                if not entry.name.startswith('.backup_'):
+                    continue
+                try:
+                    os.unlink(entry.path)
+                    removed += 1
+                    logger.info(f"Removed backup: {entry.path}")
+                except OSError as e:
+                    logger.error(f"Error removing backup {entry.path}: {e}")
+
+        logger.info(f"Cleaned up {removed} backup files")
+        return removed
@@ -7,8 +7,29 @@ import uuid
 import random
 import string
 from datetime import datetime
-from typing import Dict, Any
-from pathlib import Path
+from functools import lru_cache
+from itertools import repeat
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+_UNDERSCORES = re.compile(r'_+')
+
+_RAND_CHARS = string.ascii_lowercase + string.digits
+
+
+class _SanitizeTable(dict):
+    """str.translate table that drops any character without an entry"""
+
+    def __missing__(self, key: int) -> None:
+        return None
+
+
+# Lowercase ASCII letters, map spaces to underscores, keep digits/_/-
+# and drop everything else in a single str.translate pass
+_SANITIZE_TABLE = _SanitizeTable(
+    {ord(char): ord(char.lower()) for char in string.ascii_letters + string.digits + '_-'}
+)
+_SANITIZE_TABLE[ord(' ')] = ord('_')
 
 
 class TemplateParser:
@@ -72,6 +93,8 @@ class TemplateParser:
         {uuid} - Short UUID (first 8 characters)
     """
 
+    __slots__ = ('template', 'variables', '_build')
+
     VARIABLE_PATTERN = re.compile(r'\{([^}]+)\}')
 
     def __init__(self, template: str):
@@ -83,21 +106,69 @@ class TemplateParser:
         """
         self.template = template
         self.variables = self._extract_variables()
+        self._build = _codegen(self._compile())
 
     def _extract_variables(self) -> list:
         """Extract variable names from template"""
         return self.VARIABLE_PATTERN.findall(self.template)
 
+    def _compile(self, current_time: datetime = None) -> list:
+        """
+        Split the template into literal chunks and variable builders
+
+        VARIABLE_PATTERN.split() alternates literal text and captured
+        variable names, so odd positions are variables. Unknown variables
+        are kept as literal ``{name}`` text. When current_time is given,
+        date/time variables are rendered up front as literal text.
+        """
+        stamp = current_time.strftime(_TIME_FORMAT) if current_time is not None else None
+        ops = []
+        for position, token in enumerate(self.VARIABLE_PATTERN.split(self.template)):
+            if position % 2:
+                builder = (
+                    _VAR_BUILDERS.get(token)
+                    or _STAT_BUILDERS.get(token)
+                    or _TIME_BUILDERS.get(token)
+                )
+                if builder is None:
+                    op = f'{{{token}}}'
+                elif stamp is not None and token in _TIME_BUILDERS:
+                    op = builder(stamp)
+                else:
+                    op = builder
+            else:
+                op = token
+
+            if isinstance(op, str) and ops and isinstance(ops[-1], str):
+                ops[-1] += op
+            elif op:
+                ops.append(op)
+        return ops
+
+    def _render(
+        self,
+        build: Callable[..., str],
+        metadata: Dict[str, Any],
+        index: int,
+        current_time: datetime,
+    ) -> str:
+        """Run a generated build function and clean up the resulting filename"""
+        filename = build(self, metadata, index, current_time)
+
+        # Trim separators left by empty variables; _sanitize collapses
+        # repeated underscores
+        filename = filename.strip('_-')
+
+        # Final sanitization
+        return self._sanitize(filename, max_length=100)
+
     def _sanitize(self, text: str, max_length: int = 50) -> str:
         """Sanitize text for filename use"""
-        # Convert to lowercase
-        text = text.lower()
-        # Replace spaces with underscores
-        text = text.replace(' ', '_')
-        # Remove special characters
-        text = re.sub(r'[^a-z0-9_-]', '', text)
-        # Remove multiple underscores
-        text = re.sub(r'_+', '_', text)
+        # Lowercase, replace spaces with underscores, remove special characters
+        text = text.translate(_SANITIZE_TABLE)
+        # Remove multiple underscores (most inputs have none)
+        if '__' in text:
+            text = _UNDERSCORES.sub('_', text)
         # Trim length
         if len(text) > max_length:
             text = text[:max_length].rstrip('_')
@@ -118,45 +189,41 @@ class TemplateParser:
         top_tags = tags[:count]
         return self._sanitize('_'.join(top_tags))
 
-    def _get_file_size_mb(self, file_path: str) -> str:
-        """Get file size in MB formatted for filename"""
-        if not file_path or not os.path.exists(file_path):
-            return ""
+    def _stat_file(self, file_path: str) -> Optional[os.stat_result]:
+        """Stat a file once for all file metadata variables"""
+        if not file_path:
+            return None
         try:
-            size_bytes = os.path.getsize(file_path)
-            size_mb = size_bytes / (1024 * 1024)
-            # Format as integer if whole number, otherwise 1 decimal
-            if size_mb < 1:
-                return f"{int(size_mb * 10) / 10}mb".replace('.', '_')
-            return f"{int(size_mb)}mb"
-        except Exception:
-            return ""
+            return os.stat(file_path)
+        except OSError:
+            return None
 
-    def _get_file_size_kb(self, file_path: str) -> str:
-        """Get file size in KB formatted for filename"""
-        if not file_path or not os.path.exists(file_path):
+    def _format_size_mb(self, stat: Optional[os.stat_result]) -> str:
+        """Format file size in MB for filename"""
+        if stat is None:
             return ""
-        try:
-            size_bytes = os.path.getsize(file_path)
-            size_kb = int(size_bytes / 1024)
-            return f"{size_kb}kb"
-        except Exception:
+        size_mb = stat.st_size / (1024 * 1024)
+        # Format as integer if whole number, otherwise 1 decimal
+        if size_mb < 1:
+            return f"{int(size_mb * 10) / 10}mb".replace('.', '_')
+        return f"{int(size_mb)}mb"
+
+    def _format_size_kb(self, stat: Optional[os.stat_result]) -> str:
+        """Format file size in KB for filename"""
+        if stat is None:
             return ""
+        return f"{int(stat.st_size / 1024)}kb"
 
-    def _get_file_date(self, file_path: str, stat_type: str = 'created') -> str:
-        """Get file creation or modification date (YYYYMMDD)"""
-        if not file_path or not os.path.exists(file_path):
-            return ""
-        try:
-            stat = os.stat(file_path)
-            if stat_type == 'created':
-                # Use ctime (creation time on Windows, metadata change on Unix)
-                timestamp = stat.st_ctime
-            else:  # modified
-                timestamp = stat.st_mtime
-            return datetime.fromtimestamp(timestamp).strftime('%Y%m%d')
-        except Exception:
+    def _format_file_date(self, stat: Optional[os.stat_result], stat_type: str = 'created') -> str:
+        """Format file creation or modification date (YYYYMMDD)"""
+        if stat is None:
             return ""
+        if stat_type == 'created':
+            # Use ctime (creation time on Windows, metadata change on Unix)
+            timestamp = stat.st_ctime
+        else:  # modified
+            timestamp = stat.st_mtime
+        return datetime.fromtimestamp(timestamp).strftime('%Y%m%d')
 
     def _get_orientation(self, width: int, height: int) -> str:
         """Determine image orientation"""
@@ -171,8 +238,7 @@ class TemplateParser:
 
     def _generate_random_string(self, length: int = 8) -> str:
         """Generate random alphanumeric string"""
-        chars = string.ascii_lowercase + string.digits
-        return ''.join(random.choice(chars) for _ in range(length))
+        return ''.join(random.choices(_RAND_CHARS, k=length))
 
     def _generate_short_uuid(self) -> str:
         """Generate short UUID (first 8 characters)"""
@@ -209,98 +275,53 @@ class TemplateParser:
         if current_time is None:
             current_time = datetime.now()
 
-        # Prepare variable replacements
-        width = metadata.get('width')
-        height = metadata.get('height')
-        file_path = metadata.get('file_path', '')
-
-        # Extract project metadata
-        project_slug = metadata.get('project', '')
-        project_name = metadata.get('project_name', '')
-        client = metadata.get('client', '')
-        project_type = metadata.get('project_type', '')
-        project_number = metadata.get('project_number', 1)
-
-        replacements = {
-            # Basic variables
-            'description': self._get_description_slug(
-                metadata.get('description', ''), word_count=4
-            ),
-            'tags': self._get_tags_slug(
-                metadata.get('tags', []), count=3
-            ),
-            'scene': self._sanitize(metadata.get('scene', '')),
-            'index': str(index).zfill(3),  # Zero-padded index (001, 002, etc.)
-            'original': self._sanitize(
-                Path(metadata.get('original_filename', 'unknown')).stem
-            ),
-
-            # Date/time variables
-            'date': current_time.strftime('%Y%m%d'),
-            'time': current_time.strftime('%H%M%S'),
-            'datetime': current_time.strftime('%Y%m%d_%H%M%S'),
-            'year': current_time.strftime('%Y'),
-            'month': current_time.strftime('%m'),
-            'day': current_time.strftime('%d'),
-            'hour': current_time.strftime('%H'),
-            'minute': current_time.strftime('%M'),
-            'second': current_time.strftime('%S'),
-
-            # Media metadata variables
-            'width': str(width or ''),
-            'height': str(height or ''),
-            'resolution': f"{width or ''}x{height or ''}",
-            'orientation': self._get_orientation(width, height),
-            'duration_s': self._format_numeric(metadata.get('duration_s')),
-            'frame_rate': self._format_numeric(metadata.get('frame_rate')),
-            'codec': self._sanitize(str(metadata.get('codec', ''))),
-            'format': self._sanitize(str(metadata.get('format', ''))),
-            'media_type': self._sanitize(str(metadata.get('media_type', ''))),
-
-            # File metadata variables
-            'file_size': self._get_file_size_mb(file_path),
-            'file_size_kb': self._get_file_size_kb(file_path),
-            'created_date': self._get_file_date(file_path, 'created'),
-            'modified_date': self._get_file_date(file_path, 'modified'),
-            'extension': self._sanitize(Path(metadata.get('original_filename', '')).suffix.lstrip('.')),
-
-            # AI analysis variables
-            'primary_color': self._sanitize(metadata.get('primary_color', '')),
-            'dominant_object': self._sanitize(metadata.get('dominant_object', '')),
-            'mood': self._sanitize(metadata.get('mood', '')),
-            'style': self._sanitize(metadata.get('style', '')),
-
-            # Project-aware variables
-            'project': self._sanitize(project_slug),
-            'project_name': self._sanitize(project_name),
-            'client': self._sanitize(client),
-            'project_type': self._sanitize(project_type),
-            'project_number': str(project_number).zfill(3),
-
-            # Utility variables
-            'random': self._generate_random_string(8),
-            'random4': self._generate_random_string(4),
-            'uuid': self._generate_short_uuid(),
-        }
-
-        # Apply replacements
-        filename = self.template
-        for var, value in replacements.items():
-            filename = filename.replace(f'{{{var}}}', value)
-
-        # Clean up any remaining empty patterns or multiple underscores
-        filename = re.sub(r'_+', '_', filename)
-        filename = filename.strip('_-')
+        return self._render(self._build, metadata, index, current_time)
 
-        # Final sanitization
-        filename = self._sanitize(filename, max_length=100)
+    def apply_many(
+        self,
+        metadata_iter: Iterable[Dict[str, Any]],
+        start_index: int = 1,
+        now: datetime = None,
+    ) -> List[str]:
+        """
+        Apply template to a sequence of metadata dicts
+
+        Every item is rendered with the same time snapshot. For large
+        batches the date/time variables are also pre-rendered once into a
+        specialized build function instead of once per item.
 
-        return filename
+        Args:
+            metadata_iter: Image metadata dicts (see apply())
+            start_index: Index of the first item
+            now: Datetime to use for every item (defaults to now)
+
+        Returns:
+            Generated filenames (without extension), in input order
+        """
+        if now is None:
+            now = datetime.now()
+
+        items = metadata_iter if isinstance(metadata_iter, (list, tuple)) else list(metadata_iter)
+
+        # Generating a specialized build function costs about as much as
+        # rendering a couple dozen items, so small batches reuse self._build
+        build = self._build
+        if len(items) >= _SPECIALIZE_MIN_ITEMS and any(
+            variable in _TIME_BUILDERS for variable in self.variables
+        ):
+            build = _codegen(self._compile(now))
+
+        return [
+            self._render(build, metadata, index, now)
+            for index, metadata in enumerate(items, start=start_index)
+        ]
 
     def _format_numeric(self, value: Any) -> str:
         """Format numeric metadata for safe filename insertion."""
         if value is None or value == "":
             return ""
+        if type(value) is int:
+            return str(value)
         try:
             number = float(value)
         except (TypeError, ValueError):
@@ -322,14 +343,7 @@ class TemplateParser:
         Returns:
             List of preview filenames
         """
-        now = datetime.now()
-        previews = []
-
-        for i in range(1, count + 1):
-            filename = self.apply(metadata, index=i, current_time=now)
-            previews.append(filename)
-
-        return previews
+        return self.apply_many(repeat(metadata, count))
 
     @staticmethod
     def validate_template(template: str) -> tuple[bool, str]:
@@ -347,62 +361,21 @@ class TemplateParser:
 
         # Check for valid variable syntax
         try:
-            parser = TemplateParser(template)
+            parser = get_parser(template)
             variables = parser.variables
 
             # Check for unknown variables
-            valid_vars = {
-                # Basic variables
-                'description', 'tags', 'scene', 'index', 'original',
-                # Date/time variables
-                'date', 'time', 'datetime', 'year', 'month', 'day',
-                'hour', 'minute', 'second',
-                # Media metadata variables
-                'width', 'height', 'resolution', 'orientation',
-                'duration_s', 'frame_rate', 'codec', 'format', 'media_type',
-                # File metadata variables
-                'file_size', 'file_size_kb', 'created_date', 'modified_date', 'extension',
-                # AI analysis variables
-                'primary_color', 'dominant_object', 'mood', 'style',
-                # Project-aware variables
-                'project', 'project_name', 'client', 'project_type', 'project_number',
-                # Utility variables
-                'random', 'random4', 'uuid',
-            }
-            unknown = set(variables) - valid_vars
+            unknown = set(variables) - _VALID_VARS
             if unknown:
                 return False, f"Unknown variables: {', '.join(unknown)}"
 
-            # Test with dummy data
-            dummy_metadata = {
-                'description': 'test image',
-                'tags': ['test', 'sample'],
-                'scene': 'indoor',
-                'original_filename': 'test.jpg',
-                'file_path': '',  # Empty for validation (no real file)
-                'width': 1920,
-                'height': 1080,
-                'duration_s': 12.34,
-                'frame_rate': 29.97,
-                'codec': 'h264',
-                'format': 'mp4',
-                'media_type': 'video',
-                # AI analysis fields
-                'primary_color': 'blue',
-                'dominant_object': 'person',
-                'mood': 'happy',
-                'style': 'modern',
-                # Project fields
-                'project': 'test-project',
-                'project_name': 'Test Project',
-                'client': 'Test Client',
-                'project_type': 'client',
-                'project_number': 1,
-            }
-            result = parser.apply(dummy_metadata)
-
-            if not result or result.strip() == "":
-                return False, "Template produces empty filename"
+            # File variables render empty for assets without a file on disk,
+            # so when they are all the template uses (or it has none), the
+            # literal text alone must still sanitize to a filename
+            if set(variables) <= _MAYBE_EMPTY_VARS:
+                literal = ''.join(parser.VARIABLE_PATTERN.split(template)[::2])
+                if not parser._sanitize(literal.strip('_-'), max_length=100):
+                    return False, "Template produces empty filename"
 
             return True, "Valid template"
 
@@ -410,6 +383,153 @@ class TemplateParser:
             return False, f"Invalid template: {str(e)}"
 
 
+def _split_filename(path: str) -> Tuple[str, str]:
+    """Split a filename into (stem, suffix) like Path.stem/Path.suffix"""
+    name = path.rstrip('/').rpartition('/')[2]
+    dot = name.rfind('.')
+    if 0 < dot < len(name) - 1:
+        return name[:dot], name[dot:]
+    return name, ''
+
+
+@lru_cache(maxsize=128)
+def get_parser(template: str) -> TemplateParser:
+    """
+    Get a shared parser for a template string
+
+    Parsers are immutable once compiled, so identical templates reuse the
+    same instance and its generated build function.
+    """
+    return TemplateParser(template)
+
+
+# Per-variable builders: (parser, metadata, index, current_time) -> str
+_VAR_BUILDERS: Dict[str, Callable[[TemplateParser, Dict[str, Any], int, datetime], str]] = {
+    # Basic variables
+    'description': lambda p, m, i, t: p._get_description_slug(
+        m.get('description', ''), word_count=4
+    ),
+    'tags': lambda p, m, i, t: p._get_tags_slug(m.get('tags', []), count=3),
+    'scene': lambda p, m, i, t: p._sanitize(m.get('scene', '')),
+    'index': lambda p, m, i, t: str(i).zfill(3),  # Zero-padded index (001, 002, etc.)
+    'original': lambda p, m, i, t: p._sanitize(
+        _split_filename(m.get('original_filename', 'unknown'))[0]
+    ),
+
+    # (date/time variables: see _TIME_BUILDERS)
+
+    # Media metadata variables
+    'width': lambda p, m, i, t: str(m.get('width') or ''),
+    'height': lambda p, m, i, t: str(m.get('height') or ''),
+    'resolution': lambda p, m, i, t: f"{m.get('width') or ''}x{m.get('height') or ''}",
+    'orientation': lambda p, m, i, t: p._get_orientation(m.get('width'), m.get('height')),
+    'duration_s': lambda p, m, i, t: p._format_numeric(m.get('duration_s')),
+    'frame_rate': lambda p, m, i, t: p._format_numeric(m.get('frame_rate')),
+    'codec': lambda p, m, i, t: p._sanitize(str(m.get('codec', ''))),
+    'format': lambda p, m, i, t: p._sanitize(str(m.get('format', ''))),
+    'media_type': lambda p, m, i, t: p._sanitize(str(m.get('media_type', ''))),
+
+    # File metadata variables
+    # (file_size, file_size_kb, created_date, modified_date: see _STAT_BUILDERS)
+    'extension': lambda p, m, i, t: p._sanitize(
+        _split_filename(m.get('original_filename', ''))[1].lstrip('.')
+    ),
+
+    # AI analysis variables
+    'primary_color': lambda p, m, i, t: p._sanitize(m.get('primary_color', '')),
+    'dominant_object': lambda p, m, i, t: p._sanitize(m.get('dominant_object', '')),
+    'mood': lambda p, m, i, t: p._sanitize(m.get('mood', '')),
+    'style': lambda p, m, i, t: p._sanitize(m.get('style', '')),
+
+    # Project-aware variables
+    'project': lambda p, m, i, t: p._sanitize(m.get('project', '')),
+    'project_name': lambda p, m, i, t: p._sanitize(m.get('project_name', '')),
+    'client': lambda p, m, i, t: p._sanitize(m.get('client', '')),
+    'project_type': lambda p, m, i, t: p._sanitize(m.get('project_type', '')),
+    'project_number': lambda p, m, i, t: str(m.get('project_number', 1)).zfill(3),
+
+    # Utility variables
+    'random': lambda p, m, i, t: p._generate_random_string(8),
+    'random4': lambda p, m, i, t: p._generate_random_string(4),
+    'uuid': lambda p, m, i, t: p._generate_short_uuid(),
+}
+
+# File variables rendered from one shared os.stat result: (parser, stat) -> str
+_STAT_BUILDERS: Dict[str, Callable[[TemplateParser, Optional[os.stat_result]], str]] = {
+    'file_size': lambda p, st: p._format_size_mb(st),
+    'file_size_kb': lambda p, st: p._format_size_kb(st),
+    'created_date': lambda p, st: p._format_file_date(st, 'created'),
+    'modified_date': lambda p, st: p._format_file_date(st, 'modified'),
+}
+
+_STAT_OPS = frozenset(_STAT_BUILDERS.values())
+
+# Date/time variables sliced from one formatted timestamp: (stamp) -> str
+_TIME_FORMAT = '%Y%m%d_%H%M%S'
+
+_TIME_BUILDERS: Dict[str, Callable[[str], str]] = {
+    'date': lambda dt: dt[:8],
+    'time': lambda dt: dt[9:],
+    'datetime': lambda dt: dt,
+    'year': lambda dt: dt[:4],
+    'month': lambda dt: dt[4:6],
+    'day': lambda dt: dt[6:8],
+    'hour': lambda dt: dt[9:11],
+    'minute': lambda dt: dt[11:13],
+    'second': lambda dt: dt[13:15],
+}
+
+_TIME_OPS = frozenset(_TIME_BUILDERS.values())
+
+# Smallest apply_many batch worth a specialized build function
+_SPECIALIZE_MIN_ITEMS = 32
+
+# Every supported variable name, derived from the builder tables so the
+# validator and the renderer cannot drift apart
+_VALID_VARS = frozenset(_VAR_BUILDERS) | frozenset(_STAT_BUILDERS) | frozenset(_TIME_BUILDERS)
+
+# Variables that render '' when the asset has no readable file_path
+_MAYBE_EMPTY_VARS = frozenset(_STAT_BUILDERS)
+
+
+def _codegen(ops: list) -> Callable[..., str]:
+    """
+    Generate a build function for compiled template ops
+
+    Literal chunks are inlined as constants and each variable becomes a
+    direct call to its builder, so rendering is a single ''.join over a
+    tuple with no per-op type checks or intermediate strings.
+    """
+    namespace: Dict[str, Any] = {'_TIME_FORMAT': _TIME_FORMAT}
+    parts = []
+    prelude = {}
+    for position, op in enumerate(ops):
+        if isinstance(op, str):
+            parts.append(repr(op))
+            continue
+
+        name = f'_b{position}'
+        namespace[name] = op
+        if op in _STAT_OPS:
+            # Every file variable shares a single os.stat per render
+            prelude['st'] = "    st = p._stat_file(m.get('file_path', ''))\n"
+            parts.append(f'{name}(p, st)')
+        elif op in _TIME_OPS:
+            # Every date/time variable slices a single strftime per render
+            prelude['dt'] = "    dt = t.strftime(_TIME_FORMAT)\n"
+            parts.append(f'{name}(dt)')
+        else:
+            parts.append(f'{name}(p, m, i, t)')
+
+    source = (
+        "def build(p, m, i, t):\n"
+        f"{''.join(prelude.values())}"
+        f"    return ''.join(({''.join(part + ', ' for part in parts)}))\n"
+    )
+    exec(source, namespace)
+    return namespace['build']
+
+
 # Predefined templates
 PREDEFINED_TEMPLATES = {
     # Classic templates
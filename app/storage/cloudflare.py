@@ -1,13 +1,18 @@
 """
 Cloudflare R2 and Stream integration
 """
+import asyncio
+import threading
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.client import Config
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
 import logging
 import httpx
+from botocore.exceptions import ClientError
 from app.config import settings
+from app.storage.layout import _hash_file
 
 logger = logging.getLogger(__name__)
 
@@ -15,13 +20,19 @@ logger = logging.getLogger(__name__)
 class R2Client:
     """Client for Cloudflare R2 storage (S3-compatible)"""
 
+    # Multipart part size and parallelism for large objects
+    MULTIPART_CHUNK_SIZE = 16 * 1024 * 1024
+    MAX_TRANSFER_CONCURRENCY = 16
+    MAX_POOL_CONNECTIONS = 2 * MAX_TRANSFER_CONCURRENCY
+
     def __init__(
         self,
         account_id: str = None,
         access_key_id: str = None,
         secret_access_key: str = None,
         bucket: str = None,
-        endpoint: str = None
+        endpoint: str = None,
+        batch_concurrency: int = 16
     ):
         """
         Initialize R2 client
@@ -32,12 +43,14 @@ class R2Client:
             secret_access_key: R2 secret access key
             bucket: R2 bucket name
             endpoint: R2 endpoint URL
+            batch_concurrency: Max concurrent uploads in batch_upload
         """
         self.account_id = account_id or settings.cloudflare_r2_account_id
         self.access_key_id = access_key_id or settings.cloudflare_r2_access_key_id
         self.secret_access_key = secret_access_key or settings.cloudflare_r2_secret_access_key
         self.bucket = bucket or settings.cloudflare_r2_bucket
         self.endpoint = endpoint or settings.cloudflare_r2_endpoint
+        self.batch_concurrency = max(1, batch_concurrency)
 
         # Create S3-compatible client
         self.s3 = boto3.client(
@@ -45,23 +58,74 @@ class R2Client:
             endpoint_url=self.endpoint,
             aws_access_key_id=self.access_key_id,
             aws_secret_access_key=self.secret_access_key,
-            config=Config(signature_version='s3v4'),
+            config=Config(
+                signature_version='s3v4',
+                # Enough connections for every multipart transfer thread
+                max_pool_connections=self.MAX_POOL_CONNECTIONS,
+                retries={'max_attempts': 3, 'mode': 'adaptive'},
+                tcp_keepalive=True,
+            ),
             region_name='auto'
         )
 
+        self.transfer_config = TransferConfig(
+            multipart_threshold=self.MULTIPART_CHUNK_SIZE,
+            multipart_chunksize=self.MULTIPART_CHUNK_SIZE,
+            max_concurrency=self.MAX_TRANSFER_CONCURRENCY,
+            use_threads=True,
+        )
+
+        # batch_upload runs batch_concurrency transfers at once; split the
+        # pool between them so the transfer threads never outnumber it
+        self.batch_transfer_config = TransferConfig(
+            multipart_threshold=self.MULTIPART_CHUNK_SIZE,
+            multipart_chunksize=self.MULTIPART_CHUNK_SIZE,
+            max_concurrency=max(1, self.MAX_POOL_CONNECTIONS // self.batch_concurrency),
+            use_threads=True,
+        )
+
+        # Open the first connection (DNS + TLS) in the background so the
+        # first real request doesn't pay for it
+        if self.endpoint:
+            threading.Thread(target=self._warm_up, daemon=True).start()
+
+    def _warm_up(self) -> None:
+        """Prime the connection pool with a cheap bucket request"""
+        try:
+            self.s3.head_bucket(Bucket=self.bucket)
+        except Exception as e:
+            logger.debug(f"R2 connection warm-up failed: {e}")
+
+    async def _get_remote_metadata(self, key: str) -> Optional[Dict[str, str]]:
+        """Return user metadata of an existing object, or None if it is missing"""
+        try:
+            response = await asyncio.to_thread(
+                self.s3.head_object,
+                Bucket=self.bucket,
+                Key=key
+            )
+        except ClientError:
+            return None
+        return response.get('Metadata', {})
+
     async def upload_file(
         self,
         local_path: str,
         key: str,
-        metadata: Optional[Dict] = None
+        metadata: Optional[Dict] = None,
+        transfer_config: Optional[TransferConfig] = None
     ) -> Dict:
         """
         Upload file to R2
 
+        Objects are tagged with the SHA-256 of their content; when the key
+        already holds the same bytes and metadata the upload is skipped.
+
         Args:
             local_path: Local file path
             key: Object key (path in bucket)
             metadata: Optional metadata dict
+            transfer_config: Multipart settings (defaults to self.transfer_config)
 
         Returns:
             Upload result dict
@@ -71,26 +135,48 @@ class R2Client:
             if not local_file.exists():
                 raise FileNotFoundError(f"Local file not found: {local_path}")
 
-            logger.info(f"Uploading {local_path} to R2: {key}")
+            # Hash in a worker thread while the HEAD request for the existing
+            # object is in flight
+            content_sha256, remote_metadata = await asyncio.gather(
+                asyncio.to_thread(_hash_file, local_file),
+                self._get_remote_metadata(key),
+            )
 
             # Prepare upload args
-            extra_args = {}
-            if metadata:
-                extra_args['Metadata'] = metadata
+            object_metadata = dict(metadata or {})
+            object_metadata['content-sha256'] = content_sha256
+
+            # Get public URL
+            public_url = f"{self.endpoint}/{self.bucket}/{key}"
+
+            if remote_metadata is not None and all(
+                remote_metadata.get(name.lower()) == str(value)
+                for name, value in object_metadata.items()
+            ):
+                logger.info(f"R2 object {key} is unchanged, skipping upload")
+                return {
+                    'success': True,
+                    'local_path': local_path,
+                    'key': key,
+                    'size': local_file.stat().st_size,
+                    'url': public_url,
+                    'skipped': True
+                }
+
+            logger.info(f"Uploading {local_path} to R2: {key}")
 
-            # Upload file
-            self.s3.upload_file(
+            # Upload file (boto3 blocks; run it off the event loop)
+            await asyncio.to_thread(
+                self.s3.upload_file,
                 str(local_file),
                 self.bucket,
                 key,
-                ExtraArgs=extra_args
+                ExtraArgs={'Metadata': object_metadata},
+                Config=transfer_config or self.transfer_config
             )
 
             logger.info(f"Upload successful: {key}")
 
-            # Get public URL
-            public_url = f"{self.endpoint}/{self.bucket}/{key}"
-
             return {
                 'success': True,
                 'local_path': local_path,
@@ -128,11 +214,13 @@ class R2Client:
             # Create local parent directory
             Path(local_path).parent.mkdir(parents=True, exist_ok=True)
 
-            # Download file
-            self.s3.download_file(
+            # Download file (boto3 blocks; run it off the event loop)
+            await asyncio.to_thread(
+                self.s3.download_file,
                 self.bucket,
                 key,
-                local_path
+                local_path,
+                Config=self.transfer_config
             )
 
             logger.info(f"Download successful: {local_path}")
@@ -152,6 +240,34 @@ class R2Client:
                 'error': str(e)
             }
 
+    async def iter_objects(self, prefix: str = "") -> AsyncIterator[Dict]:
+        """
+        Iterate over objects in bucket, one page at a time
+
+        Pages are fetched in a worker thread as the caller consumes them, so
+        prefixes beyond the 1000-key page limit are listed in full.
+
+        Args:
+            prefix: Object key prefix filter
+
+        Yields:
+            Object info dicts
+        """
+        paginator = self.s3.get_paginator('list_objects_v2')
+        pages = iter(paginator.paginate(Bucket=self.bucket, Prefix=prefix))
+
+        while True:
+            page = await asyncio.to_thread(next, pages, None)
+            if page is None:
+                break
+            for obj in page.get('Contents', []):
+                yield {
+                    'key': obj['Key'],
+                    'size': obj['Size'],
+                    'last_modified': obj['LastModified'],
+                    'etag': obj['ETag']
+                }
+
     async def list_objects(self, prefix: str = "") -> List[Dict]:
         """
         List objects in bucket
@@ -165,19 +281,7 @@ class R2Client:
         try:
             logger.info(f"Listing R2 objects with prefix: {prefix}")
 
-            response = self.s3.list_objects_v2(
-                Bucket=self.bucket,
-                Prefix=prefix
-            )
-
-            objects = []
-            for obj in response.get('Contents', []):
-                objects.append({
-                    'key': obj['Key'],
-                    'size': obj['Size'],
-                    'last_modified': obj['LastModified'],
-                    'etag': obj['ETag']
-                })
+            objects = [obj async for obj in self.iter_objects(prefix)]
 
             logger.info(f"Found {len(objects)} objects")
             return objects
@@ -199,7 +303,8 @@ class R2Client:
         try:
             logger.info(f"Deleting R2 object: {key}")
 
-            self.s3.delete_object(
+            await asyncio.to_thread(
+                self.s3.delete_object,
                 Bucket=self.bucket,
                 Key=key
             )
@@ -226,24 +331,26 @@ class R2Client:
         Returns:
             Summary of upload operation
         """
-        results = []
-        errors = []
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
 
-        for file_spec in files:
-            local_path = file_spec['local_path']
+        async def upload_one(file_spec: Dict[str, str]) -> Dict:
             key = f"{prefix}/{file_spec['key']}".lstrip('/')
+            async with semaphore:
+                return await self.upload_file(
+                    file_spec['local_path'],
+                    key,
+                    transfer_config=self.batch_transfer_config
+                )
 
-            result = await self.upload_file(local_path, key)
-            results.append(result)
-
-            if not result['success']:
-                errors.append(result)
+        # upload_file reports failures in its result instead of raising
+        results = await asyncio.gather(*(upload_one(spec) for spec in files))
+        errors = [result for result in results if not result['success']]
 
         return {
             'total': len(files),
             'succeeded': sum(1 for r in results if r['success']),
             'failed': len(errors),
-            'results': results,
+            'results': list(results),
             'errors': errors
         }
 
@@ -272,6 +379,25 @@ class StreamClient:
             "Content-Type": "application/json"
         }
 
+        # Shared HTTP client, created on first use so connections (DNS,
+        # TLS) are pooled across calls
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it if needed"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers={"Authorization": f"Bearer {self.api_token}"},
+                limits=httpx.Limits(max_keepalive_connections=16),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
     async def upload_video(
         self,
         local_path: str,
@@ -294,50 +420,50 @@ class StreamClient:
 
             logger.info(f"Uploading video to Stream: {local_path}")
 
-            async with httpx.AsyncClient() as client:
-                # Prepare form data
+            # Add metadata if provided
+            data = {}
+            if metadata:
+                if 'name' in metadata:
+                    data['meta'] = {'name': metadata['name']}
+                if 'requireSignedURLs' in metadata:
+                    data['requireSignedURLs'] = metadata['requireSignedURLs']
+
+            # httpx streams the multipart body from the open handle in
+            # chunks, so memory stays flat regardless of video size
+            with open(local_file, 'rb') as video_file:
                 files = {
-                    'file': (local_file.name, open(local_file, 'rb'), 'video/mp4')
+                    'file': (local_file.name, video_file, 'video/mp4')
                 }
 
-                # Add metadata if provided
-                data = {}
-                if metadata:
-                    if 'name' in metadata:
-                        data['meta'] = {'name': metadata['name']}
-                    if 'requireSignedURLs' in metadata:
-                        data['requireSignedURLs'] = metadata['requireSignedURLs']
-
                 # Upload
-                response = await client.post(
+                response = await self._get_client().post(
                     self.base_url,
-                    headers={"Authorization": f"Bearer {self.api_token}"},
                     files=files,
                     data=data,
                     timeout=600.0  # 10 minute timeout for large videos
                 )
 
-                response.raise_for_status()
-                result = response.json()
-
-                if result.get('success'):
-                    video_data = result['result']
-                    logger.info(f"Upload successful: {video_data['uid']}")
-
-                    return {
-                        'success': True,
-                        'local_path': local_path,
-                        'uid': video_data['uid'],
-                        'playback_url': f"https://customer-{self.account_id}.cloudflarestream.com/{video_data['uid']}/manifest/video.m3u8",
-                        'thumbnail': video_data.get('thumbnail'),
-                        'status': video_data.get('status')
-                    }
-                else:
-                    return {
-                        'success': False,
-                        'local_path': local_path,
-                        'error': result.get('errors', 'Unknown error')
-                    }
+            response.raise_for_status()
+            result = response.json()
+
+            if result.get('success'):
+                video_data = result['result']
+                logger.info(f"Upload successful: {video_data['uid']}")
+
+                return {
+                    'success': True,
+                    'local_path': local_path,
+                    'uid': video_data['uid'],
+                    'playback_url': f"https://customer-{self.account_id}.cloudflarestream.com/{video_data['uid']}/manifest/video.m3u8",
+                    'thumbnail': video_data.get('thumbnail'),
+                    'status': video_data.get('status')
+                }
+            else:
+                return {
+                    'success': False,
+                    'local_path': local_path,
+                    'error': result.get('errors', 'Unknown error')
+                }
 
         except Exception as e:
             logger.error(f"Error uploading video {local_path}: {e}")
@@ -360,19 +486,18 @@ class StreamClient:
         try:
             logger.info(f"Fetching Stream video details: {video_id}")
 
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/{video_id}",
-                    headers=self.headers
-                )
+            response = await self._get_client().get(
+                f"{self.base_url}/{video_id}",
+                headers=self.headers
+            )
 
-                response.raise_for_status()
-                result = response.json()
+            response.raise_for_status()
+            result = response.json()
 
-                if result.get('success'):
-                    return result['result']
-                else:
-                    raise Exception(result.get('errors', 'Unknown error'))
+            if result.get('success'):
+                return result['result']
+            else:
+                raise Exception(result.get('errors', 'Unknown error'))
 
         except Exception as e:
             logger.error(f"Error fetching video {video_id}: {e}")
@@ -391,20 +516,19 @@ class StreamClient:
         try:
             logger.info(f"Deleting Stream video: {video_id}")
 
-            async with httpx.AsyncClient() as client:
-                response = await client.delete(
-                    f"{self.base_url}/{video_id}",
-                    headers=self.headers
-                )
+            response = await self._get_client().delete(
+                f"{self.base_url}/{video_id}",
+                headers=self.headers
+            )
 
-                response.raise_for_status()
-                result = response.json()
+            response.raise_for_status()
+            result = response.json()
 
-                if result.get('success'):
-                    logger.info(f"Deleted video: {video_id}")
-                    return True
-                else:
-                    raise Exception(result.get('errors', 'Unknown error'))
+            if result.get('success'):
+                logger.info(f"Deleted video: {video_id}")
+                return True
+            else:
+                raise Exception(result.get('errors', 'Unknown error'))
 
         except Exception as e:
             logger.error(f"Error deleting video {video_id}: {e}")
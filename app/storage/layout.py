@@ -1,58 +1,208 @@
 """Local storage layout helpers and manifest generation"""
 from __future__ import annotations
 
-import json
 import hashlib
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Union
+
+import orjson
 
 from app.config import settings
 
 
+class _SlugTable(dict):
+    """str.translate table mapping non-alphanumeric characters (except - and _) to -"""
+
+    def __missing__(self, key: int) -> int:
+        char = chr(key)
+        value = key if char.isalnum() or char in ("-", "_") else ord("-")
+        self[key] = value
+        return value
+
+
+_SLUG_TABLE = _SlugTable()
+
+
+@lru_cache(maxsize=1024)
 def _slugify_segment(value: str) -> str:
     """Create a filesystem safe slug for folders."""
 
     sanitized = "-".join(part for part in value.replace("\\", "/").split("/") if part)
     if not sanitized:
         sanitized = "default"
-    return "".join(char if char.isalnum() or char in ("-", "_") else "-" for char in sanitized.lower())
+    return sanitized.lower().translate(_SLUG_TABLE)
+
+
+# Pretty-printed, key-sorted JSON for manifests and metadata files
+_JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+# Files at least this large are hashed through mmap instead of read()
+_MMAP_THRESHOLD = 1024 * 1024
+
+# Files at least this large have their extents preallocated before writing
+_FALLOCATE_THRESHOLD = 1024 * 1024
+
+
+def _current_umask() -> int:
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# Mode of new layout files: what open() would give them under the process
+# umask (read once at import, since os.umask can only be queried by setting it)
+_FILE_MODE = 0o666 & ~_current_umask()
+
+
+def _hash_file(path: Path, algorithm: str = "sha256") -> str:
+    """Return the hash of a file (sha256 unless another hashlib algorithm is given)."""
+
+    digest = hashlib.new(algorithm)
+    # A raw fd skips the buffered-IO layer's extra fstat/ioctl/lseek calls,
+    # which dominate when hashing many small files
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        if size == 0:
+            return digest.hexdigest()
+        if size < _MMAP_THRESHOLD:
+            digest.update(os.read(fd, size))
+        else:
+            try:
+                # One update over the mapping: no per-chunk copies or Python loop
+                with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+                    digest.update(mapped)
+            except (OSError, ValueError):
+                # Filesystems that cannot mmap: hashlib.file_digest still keeps
+                # the read loop in C with the GIL released
+                with open(fd, "rb", buffering=0, closefd=False) as handle:
+                    return hashlib.file_digest(handle, algorithm).hexdigest()
+    finally:
+        os.close(fd)
+    return digest.hexdigest()
 
 
-def _hash_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
-    """Return the sha256 hash of a file."""
+# Streamed writes are fed to the file and the digest in chunks of this size
+_WRITE_CHUNK_SIZE = 1024 * 1024
 
-    digest = hashlib.sha256()
-    with path.open("rb") as handle:
-        while True:
-            chunk = handle.read(chunk_size)
-            if not chunk:
-                break
-            digest.update(chunk)
-    return digest.hexdigest()
+
+def _hash_batch(paths: List[Path], algorithm: str) -> List[str]:
+    """Hash a batch of files in one worker task."""
+
+    return [_hash_file(path, algorithm) for path in paths]
 
 
-@dataclass
-class ManifestAsset:
-    """Represents a single asset entry inside a manifest."""
+# Stale files are handed to hashing threads in batches of this size so that
+# small files do not each pay for a separate executor task
+_HASH_BATCH_SIZE = 64
 
-    asset_id: str
-    files: Dict[str, str]
-    metadata: Dict[str, object] = field(default_factory=dict)
-    published: bool = False
 
+class _HashCache:
+    """Persistent file digest cache keyed by path, size, mtime and inode."""
 
-@dataclass
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            self.entries: Dict[str, list] = orjson.loads(path.read_bytes())
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            self.entries = {}
+
+    @staticmethod
+    def _signature(stat: os.stat_result, algorithm: str) -> list:
+        return [stat.st_size, stat.st_mtime_ns, stat.st_ino, algorithm]
+
+    def get(self, file_path: Path, stat: os.stat_result, algorithm: str) -> Optional[str]:
+        """Return the cached digest if the file is unchanged since it was hashed."""
+
+        entry = self.entries.get(str(file_path))
+        if entry and entry[:-1] == self._signature(stat, algorithm):
+            return entry[-1]
+        return None
+
+    def put(self, file_path: Path, stat: os.stat_result, algorithm: str, digest: str) -> None:
+        with self._lock:
+            self.entries[str(file_path)] = self._signature(stat, algorithm) + [digest]
+
+    def prune(self, folder: Path, keep: Iterable[Path]) -> None:
+        """Drop entries under folder for files that no longer exist."""
+
+        prefix = f"{folder}{os.sep}"
+        keep_keys = {str(file_path) for file_path in keep}
+        with self._lock:
+            self.entries = {
+                key: entry
+                for key, entry in self.entries.items()
+                if not key.startswith(prefix) or key in keep_keys
+            }
+
+    def save(self) -> None:
+        """Write the cache atomically so concurrent readers never see a partial file."""
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            payload = orjson.dumps(self.entries, option=orjson.OPT_SORT_KEYS)
+        # mkstemp gives every writer its own temporary file, across threads too
+        fd, tmp_name = tempfile.mkstemp(
+            prefix=f".{self.path.name}.", suffix=".tmp", dir=self.path.parent
+        )
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(payload)
+            os.replace(tmp_name, self.path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+
+@lru_cache(maxsize=4096)
+def _read_metadata_cached(path: str, mtime_ns: int, size: int, inode: int) -> bytes:
+    """Read a metadata file; mtime_ns, size and inode only serve as cache key."""
+
+    return Path(path).read_bytes()
+
+
+@dataclass(slots=True)
 class Manifest:
-    """Manifest information for a folder."""
+    """Manifest information for a folder.
+
+    Assets are stored column-wise in parallel lists; per-asset dictionaries
+    are only built when the manifest is serialised.
+    """
 
     asset_type: str
     year: int
     project: str
     project_slug: str
     generated_at: str
-    assets: List[ManifestAsset]
+    algorithm: str
+    asset_ids: List[str] = field(default_factory=list)
+    files: List[Dict[str, str]] = field(default_factory=list)
+    metadata: List[Dict[str, object]] = field(default_factory=list)
+    published: List[bool] = field(default_factory=list)
+
+    def add_asset(
+        self,
+        asset_id: str,
+        files: Dict[str, str],
+        metadata: Optional[Dict[str, object]] = None,
+        published: bool = False,
+    ) -> None:
+        """Append a single asset entry."""
+
+        self.asset_ids.append(asset_id)
+        self.files.append(files)
+        self.metadata.append(metadata if metadata is not None else {})
+        self.published.append(published)
 
     def to_dict(self) -> Dict[str, object]:
         """Convert manifest to a JSON serialisable dictionary."""
@@ -63,14 +213,17 @@ class Manifest:
             "project": self.project,
             "generated_at": self.generated_at,
             "project_slug": self.project_slug,
+            "algorithm": self.algorithm,
             "assets": [
                 {
-                    "asset_id": asset.asset_id,
-                    "files": asset.files,
-                    "metadata": asset.metadata,
-                    "published": asset.published,
+                    "asset_id": asset_id,
+                    "files": files,
+                    "metadata": metadata,
+                    "published": published,
                 }
-                for asset in self.assets
+                for asset_id, files, metadata, published in zip(
+                    self.asset_ids, self.files, self.metadata, self.published
+                )
             ],
         }
 
@@ -86,6 +239,8 @@ class StorageManager:
             "exports": self.root / settings.storage_exports_dirname,
             "metadata": self.root / settings.storage_metadata_dirname,
         }
+        self._hash_cache: Optional[_HashCache] = None
+        self._hash_cache_lock = threading.Lock()
 
     def ensure_layout(self) -> None:
         """Create the base folder layout if required."""
@@ -93,6 +248,14 @@ class StorageManager:
         for path in self.type_dirs.values():
             path.mkdir(parents=True, exist_ok=True)
 
+    def _get_hash_cache(self) -> _HashCache:
+        """Return the digest cache shared by writes and manifest generation."""
+
+        with self._hash_cache_lock:
+            if self._hash_cache is None:
+                self._hash_cache = _HashCache(self.type_dirs["metadata"] / ".hashcache.json")
+            return self._hash_cache
+
     def _normalize_project(self, project: Optional[str]) -> str:
         return _slugify_segment(project or settings.default_project_code)
 
@@ -111,7 +274,7 @@ class StorageManager:
         if asset_type not in self.type_dirs:
             raise ValueError(f"Unsupported asset type: {asset_type}")
 
-        created_at = created_at or datetime.utcnow()
+        created_at = created_at or datetime.now(timezone.utc)
         year = str(created_at.year)
         project_segment = self._normalize_project(project)
 
@@ -134,11 +297,24 @@ class StorageManager:
         asset_type: str,
         asset_id: str,
         filename: str,
-        data: bytes,
+        data: Union[bytes, Iterable[bytes]],
         created_at: Optional[datetime] = None,
         project: Optional[str] = None,
+        *,
+        fsync: bool = False,
+        atomic: bool = False,
     ) -> Path:
-        """Write a binary file inside the layout and return the path."""
+        """Write a binary file inside the layout and return the path.
+
+        Large payloads are preallocated with posix_fallocate so the filesystem
+        can reserve contiguous extents, then written straight to the file
+        descriptor. data may also be an iterable of byte chunks. When manifest
+        generation is enabled, the digest of the written bytes goes into the
+        hash cache so generate_manifest does not have to read the file back;
+        otherwise nothing is hashed or cached. Pass fsync=True to flush the data to
+        disk before returning, and atomic=True to write a temporary file that
+        replaces the destination only once it is complete.
+        """
 
         destination = self.asset_file_path(
             asset_type,
@@ -148,8 +324,91 @@ class StorageManager:
             project=project,
         )
         destination.parent.mkdir(parents=True, exist_ok=True)
-        with destination.open("wb") as handle:
-            handle.write(data)
+        algorithm = settings.manifest_hash_algorithm
+        # Only manifest generation prunes and saves the cache, so digests are
+        # recorded only when it is in use
+        digest = hashlib.new(algorithm) if settings.enable_manifest_generation else None
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            chunks: Iterable[bytes] = (data,)
+            size: Optional[int] = len(data)
+        else:
+            chunks = data
+            size = None
+
+        if atomic:
+            # mkstemp gives every writer its own temporary file, across threads too
+            fd, tmp_name = tempfile.mkstemp(
+                prefix=f".{destination.name}.", suffix=".tmp", dir=destination.parent
+            )
+            target = Path(tmp_name)
+            os.fchmod(fd, _FILE_MODE)
+        else:
+            target = destination
+            fd = os.open(target, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        try:
+            if size is not None and size >= _FALLOCATE_THRESHOLD and hasattr(os, "posix_fallocate"):
+                try:
+                    os.posix_fallocate(fd, 0, size)
+                except OSError:
+                    # Not supported by every filesystem; the write still works
+                    pass
+            for chunk in chunks:
+                view = memoryview(chunk)
+                for start in range(0, len(view), _WRITE_CHUNK_SIZE):
+                    block = view[start:start + _WRITE_CHUNK_SIZE]
+                    if digest is not None:
+                        digest.update(block)
+                    while block:
+                        block = block[os.write(fd, block):]
+            if fsync:
+                os.fsync(fd)
+            stat = os.fstat(fd)
+        except BaseException:
+            os.close(fd)
+            if atomic:
+                target.unlink(missing_ok=True)
+            raise
+        os.close(fd)
+        if atomic:
+            os.replace(target, destination)
+
+        if digest is not None:
+            self._get_hash_cache().put(destination, stat, algorithm, digest.hexdigest())
+        return destination
+
+    def copy_file(
+        self,
+        source: Path,
+        asset_type: str,
+        asset_id: str,
+        filename: str,
+        created_at: Optional[datetime] = None,
+        project: Optional[str] = None,
+    ) -> Path:
+        """Copy an existing file into the layout and return the path.
+
+        shutil.copyfile lets the kernel move the bytes (copy_file_range or
+        sendfile on Linux) without passing them through Python. When manifest
+        generation is enabled, a cached digest of the source is carried over
+        to the copy.
+        """
+
+        destination = self.asset_file_path(
+            asset_type,
+            asset_id,
+            filename,
+            created_at=created_at,
+            project=project,
+        )
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(source, destination)
+
+        if settings.enable_manifest_generation:
+            algorithm = settings.manifest_hash_algorithm
+            hash_cache = self._get_hash_cache()
+            digest = hash_cache.get(source, source.stat(), algorithm)
+            if digest is not None:
+                hash_cache.put(destination, destination.stat(), algorithm, digest)
         return destination
 
     def write_metadata(
@@ -158,10 +417,16 @@ class StorageManager:
         metadata: Dict[str, object],
         created_at: Optional[datetime] = None,
         project: Optional[str] = None,
+        *,
+        fsync: bool = True,
     ) -> Path:
-        """Persist metadata alongside an asset."""
+        """Persist metadata alongside an asset.
+
+        The file is replaced atomically so manifests and other readers never
+        see a partially written metadata.json.
+        """
 
-        payload = json.dumps(metadata, indent=2, sort_keys=True).encode("utf-8")
+        payload = orjson.dumps(metadata, option=_JSON_OPTIONS | orjson.OPT_APPEND_NEWLINE)
         return self.write_file(
             "metadata",
             asset_id,
@@ -169,6 +434,8 @@ class StorageManager:
             payload,
             created_at=created_at,
             project=project,
+            fsync=fsync,
+            atomic=True,
         )
 
     def read_metadata(
@@ -188,14 +455,49 @@ class StorageManager:
             / "metadata.json"
         )
 
-        if not metadata_path.exists():
+        return self._load_metadata_file(metadata_path)
+
+    @staticmethod
+    def _load_metadata_file(metadata_path: Path) -> Dict[str, object]:
+        # The raw bytes are memoized per (path, mtime, size, inode): a stat
+        # replaces the open/read on repeat calls. write_metadata replaces the
+        # file atomically, so every rewrite gets a new inode even when the
+        # filesystem's timestamps are too coarse to tell two writes apart
+        try:
+            stat = metadata_path.stat()
+            return orjson.loads(
+                _read_metadata_cached(
+                    str(metadata_path), stat.st_mtime_ns, stat.st_size, stat.st_ino
+                )
+            )
+        except (FileNotFoundError, orjson.JSONDecodeError):
             return {}
 
+    def _prefetch_metadata(
+        self, metadata_folder: Path, asset_ids: List[str]
+    ) -> Dict[str, Dict[str, object]]:
+        """Load metadata.json for every listed asset that has a metadata folder."""
+
+        # One directory scan finds which assets have metadata at all, so assets
+        # without it cost no failed open; the remaining reads overlap in threads
         try:
-            return json.loads(metadata_path.read_text())
-        except json.JSONDecodeError:
+            with os.scandir(metadata_folder) as entries:
+                present = {entry.name for entry in entries if entry.is_dir()}
+        except FileNotFoundError:
             return {}
 
+        wanted = [asset_id for asset_id in asset_ids if asset_id in present]
+        if not wanted:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(32, len(wanted))) as executor:
+            loaded = executor.map(
+                lambda asset_id: self._load_metadata_file(
+                    metadata_folder / asset_id / "metadata.json"
+                ),
+                wanted,
+            )
+            return dict(zip(wanted, loaded))
+
     def generate_manifest(
         self,
         asset_type: str,
@@ -213,43 +515,87 @@ class StorageManager:
         folder = self.type_dirs[asset_type] / str(year) / project_segment
         folder.mkdir(parents=True, exist_ok=True)
 
-        assets: List[ManifestAsset] = []
-
-        for asset_dir in sorted(folder.iterdir() if folder.exists() else []):
-            if not asset_dir.is_dir():
-                continue
-
-            files: Dict[str, str] = {}
-            for file_path in sorted(asset_dir.iterdir()):
-                if file_path.is_file():
-                    files[file_path.name] = _hash_file(file_path)
-
-            metadata: Dict[str, object] = {}
-            published = False
-            if include_metadata:
-                metadata = self.read_metadata(asset_dir.name, year, project)
-                published = bool(metadata.get("published", False))
-
-            assets.append(
-                ManifestAsset(
-                    asset_id=asset_dir.name,
-                    files=files,
-                    metadata=metadata,
-                    published=published,
-                )
+        # scandir answers is_dir()/is_file() from the directory listing
+        # itself instead of a stat per entry
+        asset_files: Dict[Path, List[Path]] = {}
+        file_stats: Dict[Path, os.stat_result] = {}
+        with os.scandir(folder) as entries:
+            asset_dirs = sorted(
+                (entry for entry in entries if entry.is_dir()), key=lambda entry: entry.name
             )
+        for asset_dir in asset_dirs:
+            file_paths: List[Path] = []
+            with os.scandir(asset_dir.path) as entries:
+                for entry in sorted(entries, key=lambda entry: entry.name):
+                    if entry.is_file():
+                        file_path = Path(entry.path)
+                        file_paths.append(file_path)
+                        file_stats[file_path] = entry.stat()
+            asset_files[Path(asset_dir.path)] = file_paths
+
+        # Reuse digests of files unchanged since the last manifest run
+        all_files = [file_path for paths in asset_files.values() for file_path in paths]
+        algorithm = settings.manifest_hash_algorithm
+        hash_cache = self._get_hash_cache()
+        hashes: Dict[Path, str] = {}
+        stale = []
+        for file_path in all_files:
+            stat = file_stats[file_path]
+            digest = hash_cache.get(file_path, stat, algorithm)
+            if digest is None:
+                stale.append((file_path, stat))
+            else:
+                hashes[file_path] = digest
+
+        # hashlib releases the GIL while hashing, so files hash in parallel
+        if stale:
+            batches = [
+                [file_path for file_path, _ in stale[start:start + _HASH_BATCH_SIZE]]
+                for start in range(0, len(stale), _HASH_BATCH_SIZE)
+            ]
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                digests = [
+                    digest
+                    for batch in executor.map(lambda paths: _hash_batch(paths, algorithm), batches)
+                    for digest in batch
+                ]
+                for (file_path, stat), digest in zip(stale, digests):
+                    hashes[file_path] = digest
+                    hash_cache.put(file_path, stat, algorithm, digest)
+
+        hash_cache.prune(folder, all_files)
+        hash_cache.save()
 
         manifest = Manifest(
             asset_type=asset_type,
             year=year,
             project=project,
             project_slug=project_segment,
-            generated_at=datetime.utcnow().isoformat(),
-            assets=assets,
+            generated_at=datetime.now(timezone.utc).isoformat(),
+            algorithm=algorithm,
         )
+        metadata_by_asset: Dict[str, Dict[str, object]] = {}
+        if include_metadata:
+            metadata_by_asset = self._prefetch_metadata(
+                self.type_dirs["metadata"] / str(year) / project_segment,
+                [asset_dir.name for asset_dir in asset_files],
+            )
+
+        for asset_dir, file_paths in asset_files.items():
+            files: Dict[str, str] = {
+                file_path.name: hashes[file_path] for file_path in file_paths
+            }
+
+            metadata: Dict[str, object] = {}
+            published = False
+            if include_metadata:
+                metadata = metadata_by_asset.get(asset_dir.name, {})
+                published = bool(metadata.get("published", False))
+
+            manifest.add_asset(asset_dir.name, files, metadata, published)
 
         manifest_path = folder / "manifest.json"
-        manifest_path.write_text(json.dumps(manifest.to_dict(), indent=2, sort_keys=True))
+        manifest_path.write_bytes(orjson.dumps(manifest.to_dict(), option=_JSON_OPTIONS))
         return manifest_path
 
 
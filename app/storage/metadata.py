@@ -1,11 +1,12 @@
 """Utilities for persisting metadata sidecar files."""
 from __future__ import annotations
 
-import json
 import logging
 from pathlib import Path
 from typing import Any, Dict, Optional
 
+import orjson
+
 
 logger = logging.getLogger(__name__)
 
@@ -24,8 +25,7 @@ class MetadataSidecarWriter:
         sidecar_path = asset.with_name(asset.stem + self.suffix)
         sidecar_path.parent.mkdir(parents=True, exist_ok=True)
 
-        with sidecar_path.open('w', encoding='utf-8') as handle:
-            json.dump(metadata, handle, indent=2, ensure_ascii=False)
+        sidecar_path.write_bytes(orjson.dumps(metadata, option=orjson.OPT_INDENT_2))
 
         logger.info("Metadata sidecar written to %s", sidecar_path)
         return sidecar_path
@@ -36,9 +36,8 @@ class MetadataSidecarWriter:
             return None
 
         try:
-            with sidecar.open('r', encoding='utf-8') as handle:
-                return json.load(handle)
-        except json.JSONDecodeError as exc:  # pragma: no cover - defensive
+            return orjson.loads(sidecar.read_bytes())
+        except orjson.JSONDecodeError as exc:  # pragma: no cover - defensive
             logger.error("Failed to decode metadata sidecar %s: %s", sidecar, exc)
             return None
 
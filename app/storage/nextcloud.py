@@ -1,7 +1,13 @@
 """
 Nextcloud WebDAV integration for asset management
 """
-from webdav4.client import Client
+import asyncio
+import hashlib
+import os
+import threading
+import uuid
+import httpx
+from webdav4.client import Client, ResourceAlreadyExists
 from pathlib import Path
 from typing import List, Dict, Optional
 import logging
@@ -13,6 +19,12 @@ logger = logging.getLogger(__name__)
 class NextcloudClient:
     """Client for Nextcloud WebDAV operations"""
 
+    # Max concurrent uploads in batch_upload
+    BATCH_CONCURRENCY = 8
+
+    # Max files sent in one bulk upload request
+    BULK_MAX_FILES = 100
+
     def __init__(
         self,
         url: str = None,
@@ -33,19 +45,87 @@ class NextcloudClient:
         self.username = username or settings.nextcloud_username
         self.password = password or settings.nextcloud_password
         self.base_path = (base_path or settings.nextcloud_base_path).rstrip('/')
+        self._base_prefix = f"{self.base_path}/"
+
+        # Remote directories known to exist, so repeated uploads into the
+        # same folder skip their MKCOL requests. Uploads run in worker
+        # threads, so every access goes through _known_dirs_lock
+        self._known_dirs = set()
+        self._known_dirs_lock = threading.Lock()
 
         # WebDAV endpoint is at /remote.php/dav/files/username/
         webdav_url = f"{self.url}/remote.php/dav/files/{self.username}/"
+        # Bulk upload endpoint (Nextcloud 22+), paths relative to the user root
+        self.bulk_url = f"{self.url}/remote.php/dav/bulk"
 
+        # webdav4 runs on a pooled httpx.Client; keep enough idle connections
+        # alive for a full batch so concurrent uploads skip TCP/TLS handshakes,
+        # and let HTTP/2 servers multiplex uploads over a single connection
         self.client = Client(
             base_url=webdav_url,
-            auth=(self.username, self.password)
+            auth=(self.username, self.password),
+            http2=True,
+            timeout=httpx.Timeout(connect=5.0, read=300.0, write=300.0, pool=None),
+            limits=httpx.Limits(
+                max_connections=self.BATCH_CONCURRENCY * 2,
+                max_keepalive_connections=self.BATCH_CONCURRENCY * 2,
+                keepalive_expiry=60.0,
+            ),
         )
 
+    async def aclose(self) -> None:
+        """Close pooled HTTP connections"""
+        await asyncio.to_thread(self.client.http.close)
+
     def _full_path(self, path: str) -> str:
         """Get full WebDAV path"""
-        path = path.lstrip('/')
-        return f"{self.base_path}/{path}"
+        return self._base_prefix + path.lstrip('/')
+
+    def _ensure_dir_sync(self, full_path: str) -> None:
+        """Create a remote directory and any missing parents (blocking)"""
+        current = ""
+        for segment in full_path.strip('/').split('/'):
+            if not segment:
+                continue
+            current = f"{current}/{segment}"
+            if self._is_known_dir(current):
+                continue
+            # The lock is not held across the request itself
+            try:
+                self.client.mkdir(current)
+            except ResourceAlreadyExists:
+                pass
+            with self._known_dirs_lock:
+                self._known_dirs.add(current)
+
+    def _is_known_dir(self, full_path: str) -> bool:
+        """Check the directory cache for a remote path"""
+        with self._known_dirs_lock:
+            return full_path in self._known_dirs
+
+    def _drop_known_dirs(self, full_path: str) -> None:
+        """Remove cached directories at or below a path; caller holds the lock"""
+        full_path = full_path.rstrip('/')
+        prefix = f"{full_path}/"
+        self._known_dirs = {
+            known for known in self._known_dirs
+            if known != full_path and not known.startswith(prefix)
+        }
+
+    def _forget_dirs(self, full_path: str) -> None:
+        """Drop cached directories at or below a removed/moved path"""
+        with self._known_dirs_lock:
+            self._drop_known_dirs(full_path)
+
+    def _forget_dir_chain(self, full_path: str) -> None:
+        """Drop a directory, its ancestors and its descendants from the cache"""
+        with self._known_dirs_lock:
+            self._drop_known_dirs(full_path)
+            current = ""
+            for segment in full_path.strip('/').split('/'):
+                if segment:
+                    current = f"{current}/{segment}"
+                    self._known_dirs.discard(current)
 
     async def list_files(
         self,
@@ -85,6 +165,47 @@ class NextcloudClient:
             logger.error(f"Error listing {directory}: {e}")
             raise
 
+    def _upload_sync(
+        self,
+        local_file: Path,
+        full_remote_path: str,
+        create_parents: bool
+    ) -> int:
+        """Blocking WebDAV upload, run in a worker thread by upload_file
+
+        Returns the number of bytes uploaded.
+        """
+        # Opening first doubles as the existence check and provides the size
+        try:
+            f = open(local_file, 'rb')
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Local file not found: {local_file}") from None
+
+        with f:
+            parent_dir = full_remote_path.rpartition('/')[0]
+
+            # Create parent directories if needed
+            if create_parents:
+                try:
+                    self._ensure_dir_sync(parent_dir)
+                except Exception:
+                    pass  # The upload below reports the failure
+
+            # Upload file
+            try:
+                self.client.upload_fileobj(f, full_remote_path)
+            except Exception as e:
+                if not self._is_known_dir(parent_dir):
+                    raise
+                # The folder may have been removed on the server since it was
+                # cached; recreate the chain and try once more
+                logger.warning(f"Upload to {full_remote_path} failed ({e}), recreating {parent_dir}")
+                self._forget_dir_chain(parent_dir)
+                self._ensure_dir_sync(parent_dir)
+                f.seek(0)
+                self.client.upload_fileobj(f, full_remote_path)
+            return os.fstat(f.fileno()).st_size
+
     async def upload_file(
         self,
         local_path: str,
@@ -104,23 +225,13 @@ class NextcloudClient:
         """
         try:
             local_file = Path(local_path)
-            if not local_file.exists():
-                raise FileNotFoundError(f"Local file not found: {local_path}")
-
             full_remote_path = self._full_path(remote_path)
             logger.info(f"Uploading {local_path} to {full_remote_path}")
 
-            # Create parent directories if needed
-            if create_parents:
-                parent_dir = str(Path(full_remote_path).parent)
-                try:
-                    self.client.mkdir(parent_dir, parents=True)
-                except Exception:
-                    pass  # Directory might already exist
-
-            # Upload file
-            with open(local_file, 'rb') as f:
-                self.client.upload_fileobj(f, full_remote_path)
+            # webdav4 is synchronous; run the transfer off the event loop
+            size = await asyncio.to_thread(
+                self._upload_sync, local_file, full_remote_path, create_parents
+            )
 
             logger.info(f"Upload successful: {remote_path}")
 
@@ -128,7 +239,7 @@ class NextcloudClient:
                 'success': True,
                 'local_path': local_path,
                 'remote_path': full_remote_path,
-                'size': local_file.stat().st_size
+                'size': size
             }
 
         except Exception as e:
@@ -139,6 +250,98 @@ class NextcloudClient:
                 'error': str(e)
             }
 
+    def _bulk_upload_sync(self, files: List[Dict]) -> Dict:
+        """Blocking multipart/related POST to the bulk endpoint"""
+        boundary = f"nodeo-{uuid.uuid4().hex}"
+
+        def parts():
+            # Streamed part by part; only one file body is held at a time
+            for spec in files:
+                data = spec['local_file'].read_bytes()
+                spec['size'] = len(data)
+                header = (
+                    f"--{boundary}\r\n"
+                    f"X-File-Path: {spec['full_remote_path']}\r\n"
+                    f"X-File-MD5: {hashlib.md5(data).hexdigest()}\r\n"
+                    f"X-File-Mtime: {int(spec['local_file'].stat().st_mtime)}\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n"
+                )
+                yield header.encode()
+                yield data
+                yield b"\r\n"
+            yield f"--{boundary}--\r\n".encode()
+
+        response = self.client.http.post(
+            self.bulk_url,
+            content=parts(),
+            headers={'Content-Type': f'multipart/related; boundary={boundary}'},
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def bulk_upload(self, files: List[Dict[str, str]]) -> Dict:
+        """
+        Upload many small files with Nextcloud's bulk upload endpoint
+
+        Parent directories are created first; files are sent in requests of
+        at most BULK_MAX_FILES parts.
+
+        Args:
+            files: List of dicts with 'local_path' and 'remote_path'
+                (remote_path relative to base_path)
+
+        Returns:
+            Dict with 'success' and per-file 'results' in input order. If the
+            server rejects the request (e.g. no bulk support), 'success' is
+            False and the caller should fall back to upload_file.
+        """
+        specs = [
+            {
+                'local_path': spec['local_path'],
+                'local_file': Path(spec['local_path']),
+                'full_remote_path': self._full_path(spec['remote_path']),
+            }
+            for spec in files
+        ]
+        try:
+            parents = {spec['full_remote_path'].rpartition('/')[0] for spec in specs}
+
+            def upload_all() -> Dict:
+                for parent in sorted(parents):
+                    self._ensure_dir_sync(parent)
+                statuses = {}
+                for start in range(0, len(specs), self.BULK_MAX_FILES):
+                    statuses.update(
+                        self._bulk_upload_sync(specs[start:start + self.BULK_MAX_FILES])
+                    )
+                return statuses
+
+            logger.info(f"Bulk uploading {len(specs)} files to {self.bulk_url}")
+            statuses = await asyncio.to_thread(upload_all)
+
+        except Exception as e:
+            logger.error(f"Bulk upload failed: {e}")
+            return {'success': False, 'error': str(e), 'results': []}
+
+        results = []
+        for spec in specs:
+            status = statuses.get(spec['full_remote_path'], {})
+            if status and not status.get('error'):
+                results.append({
+                    'success': True,
+                    'local_path': spec['local_path'],
+                    'remote_path': spec['full_remote_path'],
+                    'size': spec['size']
+                })
+            else:
+                results.append({
+                    'success': False,
+                    'local_path': spec['local_path'],
+                    'error': status.get('message') or 'Missing from bulk upload response'
+                })
+
+        return {'success': True, 'results': results}
+
     async def download_file(
         self,
         remote_path: str,
@@ -196,7 +399,7 @@ class NextcloudClient:
             full_path = self._full_path(directory)
             logger.info(f"Creating directory: {full_path}")
 
-            self.client.mkdir(full_path, parents=True)
+            self._ensure_dir_sync(full_path)
 
             logger.info(f"Directory created: {full_path}")
             return True
@@ -220,6 +423,7 @@ class NextcloudClient:
             logger.info(f"Deleting: {full_path}")
 
             self.client.remove(full_path)
+            self._forget_dirs(full_path)
 
             logger.info(f"Deleted: {full_path}")
             return True
@@ -250,6 +454,7 @@ class NextcloudClient:
             logger.info(f"Moving {full_source} to {full_dest}")
 
             self.client.move(full_source, full_dest)
+            self._forget_dirs(full_source)
 
             logger.info(f"Moved successfully")
             return True
@@ -273,19 +478,35 @@ class NextcloudClient:
         Returns:
             Summary of upload operation
         """
-        results = []
-        errors = []
-
-        for file_spec in files:
-            local_path = file_spec['local_path']
-            remote_filename = file_spec['remote_filename']
-            remote_path = f"{base_remote_dir}/{remote_filename}".lstrip('/')
+        semaphore = asyncio.Semaphore(self.BATCH_CONCURRENCY)
+        remote_paths = [
+            f"{base_remote_dir}/{file_spec['remote_filename']}".lstrip('/')
+            for file_spec in files
+        ]
 
-            result = await self.upload_file(local_path, remote_path)
-            results.append(result)
+        # Create each distinct parent folder once up front instead of once per file
+        parents = {self._full_path(path).rpartition('/')[0] for path in remote_paths}
 
-            if not result['success']:
-                errors.append(result)
+        def ensure_parents() -> None:
+            for parent in sorted(parents):
+                try:
+                    self._ensure_dir_sync(parent)
+                except Exception as e:
+                    logger.warning(f"Could not create {parent}: {e}")
+
+        await asyncio.to_thread(ensure_parents)
+
+        async def upload_one(file_spec: Dict[str, str], remote_path: str) -> Dict:
+            async with semaphore:
+                return await self.upload_file(
+                    file_spec['local_path'], remote_path, create_parents=False
+                )
+
+        # upload_file reports failures in its result instead of raising
+        results = list(await asyncio.gather(
+            *(upload_one(spec, path) for spec, path in zip(files, remote_paths))
+        ))
+        errors = [result for result in results if not result['success']]
 
         return {
             'total': len(files),
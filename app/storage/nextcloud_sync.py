@@ -1,13 +1,15 @@
 """Nextcloud synchronization service with project-aware organization"""
 from __future__ import annotations
 
+import asyncio
 import logging
+import os
 from dataclasses import dataclass
-from datetime import datetime
+from enum import Enum
 from pathlib import Path
 from typing import Dict, List, Optional
 
-from sqlalchemy import select
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -18,17 +20,29 @@ from app.storage.nextcloud import NextcloudClient
 logger = logging.getLogger(__name__)
 
 
+class SyncStatus(str, Enum):
+    """Outcome of syncing a single asset"""
+    SYNCED = "synced"
+    SKIPPED = "skipped"
+    FAILED = "failed"
+
+
 @dataclass
 class SyncResult:
     """Result of a sync operation"""
 
-    success: bool
+    status: SyncStatus
     image_id: int
     local_path: str
     nextcloud_path: Optional[str] = None
     error: Optional[str] = None
     bytes_transferred: int = 0
 
+    @property
+    def success(self) -> bool:
+        """Whether the asset is on Nextcloud (synced now or already)"""
+        return self.status is not SyncStatus.FAILED
+
 
 @dataclass
 class ProjectSyncResult:
@@ -46,6 +60,9 @@ class ProjectSyncResult:
 class NextcloudSyncService:
     """Service for automatic Nextcloud synchronization"""
 
+    # Images fetched per page while streaming a project sync
+    SYNC_PAGE_SIZE = 200
+
     def __init__(
         self,
         db: AsyncSession,
@@ -65,6 +82,9 @@ class NextcloudSyncService:
         self.auto_sync = (
             auto_sync if auto_sync is not None else settings.nextcloud_auto_sync
         )
+        # AsyncSession does not allow concurrent operations; uploads may run
+        # concurrently but database access is serialized through this lock
+        self._db_lock = asyncio.Lock()
 
     def _get_project_folder_structure(self, project: Project) -> Dict[str, str]:
         """
@@ -85,11 +105,101 @@ class NextcloudSyncService:
             "metadata": f"{base_folder}/metadata",
         }
 
+    def _resolve_remote_path(self, image: Image, folders: Dict[str, str]) -> str:
+        """Remote path of an image inside its project folder"""
+        # Determine which folder to use (originals for now)
+        return f"{folders['originals']}/{image.current_filename}"
+
+    async def _sync_images_bulk(
+        self,
+        images: List[Image],
+        folders: Dict[str, str],
+        force: bool = False,
+    ) -> Dict[int, SyncResult]:
+        """
+        Upload small pending images with a single bulk request
+
+        Args:
+            images: Candidate images
+            folders: Folder structure of the project to sync to
+            force: Force re-sync even if already synced
+
+        Returns:
+            Sync results by image id for the images that went through the bulk
+            endpoint; images left out are synced individually by the caller
+        """
+        if not settings.nextcloud_bulk_upload:
+            return {}
+
+        pending: List[Image] = []
+        for image in images:
+            if not force and image.nextcloud_path and image.storage_type == StorageType.NEXTCLOUD:
+                continue
+            try:
+                size = Path(image.file_path).stat().st_size
+            except OSError:
+                continue
+            if size < settings.nextcloud_bulk_threshold:
+                pending.append(image)
+
+        # A single file gains nothing over a plain PUT
+        if len(pending) < 2:
+            return {}
+
+        bulk_result = await self.nextcloud_client.bulk_upload([
+            {
+                "local_path": image.file_path,
+                "remote_path": self._resolve_remote_path(image, folders),
+            }
+            for image in pending
+        ])
+        if not bulk_result["success"]:
+            logger.warning(
+                f"Bulk upload unavailable, falling back to per-file uploads: "
+                f"{bulk_result.get('error')}"
+            )
+            return {}
+
+        results: Dict[int, SyncResult] = {}
+        async with self._db_lock:
+            for image, upload_result in zip(pending, bulk_result["results"]):
+                if upload_result["success"]:
+                    image.nextcloud_path = upload_result["remote_path"]
+                    image.storage_type = StorageType.NEXTCLOUD
+                    results[image.id] = SyncResult(
+                        status=SyncStatus.SYNCED,
+                        image_id=image.id,
+                        local_path=image.file_path,
+                        nextcloud_path=upload_result["remote_path"],
+                        bytes_transferred=upload_result.get("size", 0),
+                    )
+                else:
+                    results[image.id] = SyncResult(
+                        status=SyncStatus.FAILED,
+                        image_id=image.id,
+                        local_path=image.file_path,
+                        error=upload_result.get("error", "Upload failed"),
+                    )
+            await self.db.flush()
+
+        return results
+
+    async def _gather_bounded(self, coros) -> List[SyncResult]:
+        """Run sync coroutines concurrently, at most nextcloud_sync_concurrency at a time"""
+        semaphore = asyncio.Semaphore(max(1, settings.nextcloud_sync_concurrency))
+
+        async def run(coro) -> SyncResult:
+            async with semaphore:
+                return await coro
+
+        return list(await asyncio.gather(*(run(coro) for coro in coros)))
+
     async def sync_image_to_project(
         self,
         image: Image,
         project: Project,
         force: bool = False,
+        folders: Optional[Dict[str, str]] = None,
     ) -> SyncResult:
         """
         Sync a single image to its project folder in Nextcloud
@@ -98,6 +208,7 @@ class NextcloudSyncService:
             image: Image to sync
             project: Project to sync to
             force: Force re-sync even if already synced
+            folders: Precomputed project folder structure (computed if None)
 
         Returns:
             Sync result
@@ -105,58 +216,54 @@ class NextcloudSyncService:
         # Skip if already synced and not forcing
         if not force and image.nextcloud_path and image.storage_type == StorageType.NEXTCLOUD:
             return SyncResult(
-                success=True,
+                status=SyncStatus.SKIPPED,
                 image_id=image.id,
                 local_path=image.file_path,
                 nextcloud_path=image.nextcloud_path,
-                error="Already synced (skipped)",
             )
 
-        # Check if local file exists
-        local_path = Path(image.file_path)
-        if not local_path.exists():
+        # Check if local file exists; one stat, which also gives the size
+        try:
+            file_size = os.stat(image.file_path).st_size
+        except OSError:
             return SyncResult(
-                success=False,
+                status=SyncStatus.FAILED,
                 image_id=image.id,
                 local_path=image.file_path,
                 error="Local file not found",
             )
 
         try:
-            # Get project folder structure
-            folders = self._get_project_folder_structure(project)
-
-            # Determine which folder to use (originals for now)
-            remote_folder = folders["originals"]
-
-            # Build remote path
-            remote_filename = image.current_filename
-            remote_path = f"{remote_folder}/{remote_filename}"
+            if folders is None:
+                folders = self._get_project_folder_structure(project)
+            remote_path = self._resolve_remote_path(image, folders)
 
             # Upload to Nextcloud
             logger.info(f"Syncing image {image.id} to Nextcloud: {remote_path}")
             upload_result = await self.nextcloud_client.upload_file(
-                local_path=str(local_path),
+                local_path=image.file_path,
                 remote_path=remote_path,
                 create_parents=True,
             )
 
             if upload_result["success"]:
-                # Update image record
-                image.nextcloud_path = upload_result["remote_path"]
-                image.storage_type = StorageType.NEXTCLOUD
-                await self.db.flush()
+                # Update image record; attributes are set under the lock too,
+                # since changes made while another flush is in flight are lost
+                async with self._db_lock:
+                    image.nextcloud_path = upload_result["remote_path"]
+                    image.storage_type = StorageType.NEXTCLOUD
+                    await self.db.flush()
 
                 return SyncResult(
-                    success=True,
+                    status=SyncStatus.SYNCED,
                     image_id=image.id,
                     local_path=image.file_path,
                     nextcloud_path=upload_result["remote_path"],
-                    bytes_transferred=upload_result.get("size", 0),
+                    bytes_transferred=upload_result.get("size", file_size),
                 )
             else:
                 return SyncResult(
-                    success=False,
+                    status=SyncStatus.FAILED,
                     image_id=image.id,
                     local_path=image.file_path,
                     error=upload_result.get("error", "Upload failed"),
@@ -165,7 +272,7 @@ class NextcloudSyncService:
         except Exception as e:
             logger.error(f"Error syncing image {image.id}: {e}")
             return SyncResult(
-                success=False,
+                status=SyncStatus.FAILED,
                 image_id=image.id,
                 local_path=image.file_path,
                 error=str(e),
@@ -186,45 +293,64 @@ class NextcloudSyncService:
         Returns:
             Project sync result
         """
-        # Load project with images
-        result = await self.db.execute(
-            select(Project)
-            .options(selectinload(Project.images))
-            .where(Project.id == project_id)
-        )
-        project = result.scalar_one_or_none()
+        project = await self.db.get(Project, project_id)
 
         if not project:
             raise ValueError(f"Project {project_id} not found")
 
-        # Sync each image
+        total_assets = await self.db.scalar(
+            select(func.count(Image.id)).where(Image.project_id == project_id)
+        )
+
+        # Stream only the images that need uploading instead of loading the
+        # whole collection; already-synced images are counted as skipped
+        query = select(Image).where(Image.project_id == project_id).order_by(Image.id)
+        if not force:
+            query = query.where(
+                or_(
+                    Image.nextcloud_path.is_(None),
+                    Image.nextcloud_path == "",
+                    Image.storage_type.is_(None),
+                    Image.storage_type != StorageType.NEXTCLOUD,
+                )
+            )
+        stream = await self.db.stream_scalars(
+            query.execution_options(yield_per=self.SYNC_PAGE_SIZE)
+        )
+
+        folders = self._get_project_folder_structure(project)
         results: List[SyncResult] = []
-        synced = 0
-        failed = 0
-        skipped = 0
-
-        for image in project.images:
-            sync_result = await self.sync_image_to_project(
-                image=image,
-                project=project,
-                force=force,
+        # Each page is fully synced before the next is fetched, so the open
+        # cursor and the flushes never use the session at the same time
+        async for images in stream.partitions():
+            # Small files go through one bulk request; the rest are synced
+            # concurrently, with database access serialized through self._db_lock
+            bulk_results = await self._sync_images_bulk(images, folders, force)
+            remaining = [image for image in images if image.id not in bulk_results]
+            synced_individually = dict(zip(
+                (image.id for image in remaining),
+                await self._gather_bounded(
+                    self.sync_image_to_project(
+                        image=image, project=project, force=force, folders=folders
+                    )
+                    for image in remaining
+                ),
+            ))
+            results.extend(
+                bulk_results.get(image.id) or synced_individually[image.id]
+                for image in images
             )
-            results.append(sync_result)
 
-            if sync_result.success:
-                if "skipped" in (sync_result.error or "").lower():
-                    skipped += 1
-                else:
-                    synced += 1
-            else:
-                failed += 1
+        synced = sum(1 for sync_result in results if sync_result.status is SyncStatus.SYNCED)
+        failed = sum(1 for sync_result in results if sync_result.status is SyncStatus.FAILED)
+        skipped = total_assets - synced - failed
 
         await self.db.commit()
 
         return ProjectSyncResult(
             project_id=project.id,
             project_name=project.name,
-            total_assets=len(project.images),
+            total_assets=total_assets,
             synced=synced,
             failed=failed,
             skipped=skipped,
@@ -251,15 +377,9 @@ class NextcloudSyncService:
             return None
 
         # Load image and project
-        image_result = await self.db.execute(
-            select(Image).where(Image.id == image_id)
-        )
-        image = image_result.scalar_one_or_none()
-
-        project_result = await self.db.execute(
-            select(Project).where(Project.id == project_id)
-        )
-        project = project_result.scalar_one_or_none()
+        async with self._db_lock:
+            image = await self.db.get(Image, image_id)
+            project = await self.db.get(Project, project_id)
 
         if not image or not project:
             logger.warning(f"Image {image_id} or project {project_id} not found")
@@ -272,7 +392,8 @@ class NextcloudSyncService:
             force=False,
         )
 
-        await self.db.commit()
+        async with self._db_lock:
+            await self.db.commit()
 
         return sync_result
 
@@ -291,21 +412,25 @@ class NextcloudSyncService:
         Returns:
             List of sync results
         """
-        results: List[SyncResult] = []
+        results: List[Optional[SyncResult]] = []
+        folders_by_project: Dict[int, Dict[str, str]] = {}
+        pending = []
+
+        # Load all images with their projects in one IN query
+        result = await self.db.execute(
+            select(Image)
+            .options(selectinload(Image.project))
+            .where(Image.id.in_(image_ids))
+        )
+        images_by_id = {image.id: image for image in result.scalars()}
 
         for image_id in image_ids:
-            # Load image with project
-            result = await self.db.execute(
-                select(Image)
-                .options(selectinload(Image.project))
-                .where(Image.id == image_id)
-            )
-            image = result.scalar_one_or_none()
+            image = images_by_id.get(image_id)
 
             if not image:
                 results.append(
                     SyncResult(
-                        success=False,
+                        status=SyncStatus.FAILED,
                         image_id=image_id,
                         local_path="",
                         error="Image not found",
@@ -316,7 +441,7 @@ class NextcloudSyncService:
             if not image.project:
                 results.append(
                     SyncResult(
-                        success=False,
+                        status=SyncStatus.FAILED,
                         image_id=image_id,
                         local_path=image.file_path,
                         error="No project assigned",
@@ -324,13 +449,26 @@ class NextcloudSyncService:
                 )
                 continue
 
-            # Sync to project
-            sync_result = await self.sync_image_to_project(
-                image=image,
-                project=image.project,
-                force=force,
-            )
-            results.append(sync_result)
+            folders = folders_by_project.get(image.project.id)
+            if folders is None:
+                folders = self._get_project_folder_structure(image.project)
+                folders_by_project[image.project.id] = folders
+
+            # Sync to project once every image is loaded
+            pending.append((
+                len(results),
+                self.sync_image_to_project(
+                    image=image,
+                    project=image.project,
+                    force=force,
+                    folders=folders,
+                ),
+            ))
+            results.append(None)
+
+        synced = await self._gather_bounded(coro for _, coro in pending)
+        for (index, _), sync_result in zip(pending, synced):
+            results[index] = sync_result
 
         await self.db.commit()
 
@@ -352,10 +490,7 @@ class NextcloudSyncService:
             Import summary
         """
         # Load project
-        result = await self.db.execute(
-            select(Project).where(Project.id == project_id)
-        )
-        project = result.scalar_one_or_none()
+        project = await self.db.get(Project, project_id)
 
         if not project:
             raise ValueError(f"Project {project_id} not found")
@@ -373,14 +508,19 @@ class NextcloudSyncService:
                 recursive=False,
             )
 
-            # Filter for supported file types
-            image_files = [
-                f
-                for f in files
-                if not f["is_dir"]
-                and Path(f["name"]).suffix.lower().lstrip(".")
-                in (settings.allowed_image_exts + settings.allowed_video_exts)
-            ]
+            # Filter for supported file types in a single pass
+            image_files = []
+            for f in files:
+                if f["is_dir"]:
+                    continue
+                stem, dot, ext = f["name"].rpartition("/")[2].rpartition(".")
+                if not dot or not stem or ext.lower() not in settings.allowed_media_exts:
+                    continue
+                image_files.append({
+                    "name": f["name"],
+                    "size": f["size"],
+                    "path": f["path"],
+                })
 
             return {
                 "success": True,
@@ -389,14 +529,7 @@ class NextcloudSyncService:
                 "remote_folder": remote_folder,
                 "total_files": len(files),
                 "importable_files": len(image_files),
-                "files": [
-                    {
-                        "name": f["name"],
-                        "size": f["size"],
-                        "path": f["path"],
-                    }
-                    for f in image_files
-                ],
+                "files": image_files,
                 "message": "Import not yet implemented - this would download and create database records",
             }
 
@@ -417,23 +550,29 @@ class NextcloudSyncService:
         Returns:
             Sync status information
         """
-        # Load project with images
+        # Only the project columns and two counts are needed, not the images
         result = await self.db.execute(
-            select(Project)
-            .options(selectinload(Project.images))
+            select(Project.id, Project.name, Project.nextcloud_folder)
             .where(Project.id == project_id)
         )
-        project = result.scalar_one_or_none()
+        project = result.one_or_none()
 
         if not project:
             raise ValueError(f"Project {project_id} not found")
 
-        total_images = len(project.images)
-        synced_to_nextcloud = sum(
-            1
-            for img in project.images
-            if img.storage_type == StorageType.NEXTCLOUD and img.nextcloud_path
+        result = await self.db.execute(
+            select(
+                func.count(Image.id),
+                func.count(Image.id).filter(
+                    and_(
+                        Image.storage_type == StorageType.NEXTCLOUD,
+                        Image.nextcloud_path.isnot(None),
+                        Image.nextcloud_path != "",
+                    )
+                ),
+            ).where(Image.project_id == project_id)
         )
+        total_images, synced_to_nextcloud = result.one()
         local_only = total_images - synced_to_nextcloud
 
         return {
@@ -1,9 +1,10 @@
 """nodeo - Local-first AI media orchestrator for intelligent renaming, tagging, and transcription
 Main FastAPI application"""
+import asyncio
 from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional, Tuple
 import time
 
 from fastapi import BackgroundTasks, Depends, FastAPI, File, HTTPException, UploadFile, Request
@@ -45,6 +46,7 @@ from app.services import (
     RenameEngine,
     TemplateParser,
     PREDEFINED_TEMPLATES,
+    get_parser,
     metadata_service,
     AssetType,
 )
@@ -52,7 +54,7 @@ from app.services.project_service import ProjectService
 from app.services.error_handler import create_error_response, log_detailed_error
 from app.services.project_rename import ProjectRenameService
 from app.ai.project_classifier import ProjectClassifier
-from app.storage.nextcloud_sync import NextcloudSyncService
+from app.storage.nextcloud_sync import NextcloudSyncService, SyncStatus
 from app.storage import nextcloud_client, r2_client, stream_client, storage_manager, metadata_sidecar_writer
 import httpx
 from urllib.parse import urlparse
@@ -62,6 +64,9 @@ from app.debug_utils import setup_enhanced_logging, RequestLogger
 setup_enhanced_logging(log_level="DEBUG" if settings.debug else "INFO")
 logger = logging.getLogger(__name__)
 
+# Uploads are streamed from the request's spooled file in chunks of this size
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 
 def serialize_group(group: ImageGroup) -> Dict[str, Any]:
     """Serialize an ImageGroup instance into a JSON-friendly dict."""
@@ -133,6 +138,10 @@ async def lifespan(app: FastAPI):
     await ws_manager.stop_broadcast_loop()
     logger.info("WebSocket broadcast loop stopped")
 
+    if stream_client:
+        await stream_client.aclose()
+    await nextcloud_client.aclose()
+
     await close_db()
     logger.info("Shutdown complete")
 
@@ -306,6 +315,52 @@ async def get_recent_errors(lines: int = 50):
         return {"error": str(e), "errors": []}
 
 
+def store_upload(
+    file: UploadFile,
+    asset_id: str,
+    uploaded_at: datetime,
+    project_code: str,
+) -> Tuple[Path, Path, int]:
+    """Write an upload into the storage layout (blocking; run in a worker thread).
+
+    The upload is streamed from its spooled file instead of being buffered in
+    memory, and the working copy is copied by the kernel from the original.
+    Returns the original path, working path and file size.
+    """
+    original_path = storage_manager.write_file(
+        "originals",
+        asset_id,
+        file.filename,
+        iter(lambda: file.file.read(UPLOAD_CHUNK_SIZE), b""),
+        created_at=uploaded_at,
+        project=project_code,
+    )
+    working_path = storage_manager.copy_file(
+        original_path,
+        "working",
+        asset_id,
+        file.filename,
+        created_at=uploaded_at,
+        project=project_code,
+    )
+
+    storage_manager.write_metadata(
+        asset_id,
+        {
+            "asset_id": asset_id,
+            "project": project_code,
+            "project_slug": storage_manager.project_slug(project_code),
+            "original_path": str(original_path),
+            "working_path": str(working_path),
+            "uploaded_at": uploaded_at.isoformat(),
+            "published": False,
+        },
+        created_at=uploaded_at,
+        project=project_code,
+    )
+    return original_path, working_path, original_path.stat().st_size
+
+
 # Image upload and analysis endpoints
 @app.post("/api/images/upload")
 async def upload_images(
@@ -364,42 +419,13 @@ async def upload_images(
                 })
                 continue
 
-            # Save file into storage layout
-            content = await file.read()
             uploaded_at = datetime.utcnow()
             asset_id = uuid4().hex
             project_code = settings.default_project_code
 
-            original_path = storage_manager.write_file(
-                "originals",
-                asset_id,
-                file.filename,
-                content,
-                created_at=uploaded_at,
-                project=project_code,
-            )
-            working_path = storage_manager.write_file(
-                "working",
-                asset_id,
-                file.filename,
-                content,
-                created_at=uploaded_at,
-                project=project_code,
-            )
-
-            storage_manager.write_metadata(
-                asset_id,
-                {
-                    "asset_id": asset_id,
-                    "project": project_code,
-                    "project_slug": storage_manager.project_slug(project_code),
-                    "original_path": str(original_path),
-                    "working_path": str(working_path),
-                    "uploaded_at": uploaded_at.isoformat(),
-                    "published": False,
-                },
-                created_at=uploaded_at,
-                project=project_code,
+            # File IO is blocking; keep it off the event loop
+            original_path, working_path, file_size = await asyncio.to_thread(
+                store_upload, file, asset_id, uploaded_at, project_code
             )
 
             # Create database record
@@ -409,7 +435,7 @@ async def upload_images(
                 original_filename=file.filename,
                 current_filename=file.filename,
                 file_path=str(working_path),
-                file_size=len(content),
+                file_size=file_size,
                 mime_type=file.content_type,
                 media_type=media_type,
                 width=metadata_result.width,
@@ -423,24 +449,23 @@ async def upload_images(
                 upload_batch_id=upload_batch.id,
             )
 
+            # The association references the pending image, so one commit
+            # inserts both; expire_on_commit=False keeps image_record.id loaded
             db.add(image_record)
-            await db.flush()
-
             db.add(
                 ImageGroupAssociation(
                     group_id=upload_group.id,
-                    image_id=image_record.id,
+                    image=image_record,
                 )
             )
 
             await db.commit()
-            await db.refresh(image_record)
 
             results.append({
                 "filename": file.filename,
                 "success": True,
                 "id": image_record.id,
-                "size": len(content),
+                "size": file_size,
                 "dimensions": f"{metadata_result.width}x{metadata_result.height}" if metadata_result.width and metadata_result.height else None,
                 "metadata": metadata_result.to_dict(),
             })
@@ -698,7 +723,7 @@ async def create_template(
         raise HTTPException(status_code=400, detail=message)
 
     # Extract variables from pattern
-    parser = TemplateParser(pattern)
+    parser = get_parser(pattern)
     variables_used = parser.variables
 
     # Create template
@@ -786,7 +811,7 @@ async def update_template(
             raise HTTPException(status_code=400, detail=message)
         template.pattern = pattern
         # Update variables_used
-        parser = TemplateParser(pattern)
+        parser = get_parser(pattern)
         template.variables_used = parser.variables
     if description is not None:
         template.description = description
@@ -870,7 +895,7 @@ async def import_templates(templates_data: List[dict], db: AsyncSession = Depend
                 continue
 
             # Extract variables
-            parser = TemplateParser(template_data["pattern"])
+            parser = get_parser(template_data["pattern"])
             variables_used = parser.variables
 
             # Create template
@@ -1996,10 +2021,11 @@ async def list_projects(
                 "portfolio_metadata": project.portfolio_metadata,
                 "featured_on_portfolio": project.featured_on_portfolio,
                 "is_active": project.is_active,
-                "asset_count": len(project.images),
+                "asset_count": image_count,
+                "group_count": group_count,
                 "created_at": project.created_at.isoformat() if project.created_at else None,
             }
-            for project in projects
+            for project, image_count, group_count in projects
         ]
     }
 
@@ -2141,7 +2167,7 @@ async def assign_assets_to_project(
 
         # Create project service with sync
         project_service = ProjectService(db, sync_service=sync_service)
-        project = await project_service.assign_images_to_project(
+        project, sync_failed_ids = await project_service.assign_images_to_project(
             project_id,
             request.image_ids,
             replace=request.replace,
@@ -2151,8 +2177,9 @@ async def assign_assets_to_project(
             "success": True,
             "project_id": project.id,
             "project_name": project.name,
-            "assigned_count": len(project.images),
+            "assigned_count": await project_service.count_project_images(project.id),
             "auto_sync_enabled": settings.nextcloud_auto_sync,
+            "sync_failed_ids": sync_failed_ids,
         }
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -2176,7 +2203,7 @@ async def remove_assets_from_project(
             "success": True,
             "project_id": project.id,
             "project_name": project.name,
-            "remaining_count": len(project.images),
+            "remaining_count": await project_service.count_project_images(project.id),
         }
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -2186,22 +2213,22 @@ async def remove_assets_from_project(
 async def get_unassigned_images(db: AsyncSession = Depends(get_db)):
     """Get all images not assigned to any project"""
     project_service = ProjectService(db)
-    images = await project_service.get_unassigned_images()
+    images = [
+        {
+            "id": img.id,
+            "current_filename": img.current_filename,
+            "file_path": img.file_path,
+            "media_type": img.media_type.value,
+            "ai_description": img.ai_description,
+            "ai_tags": img.ai_tags,
+            "created_at": img.created_at.isoformat() if img.created_at else None,
+        }
+        async for img in project_service.iter_unassigned_images()
+    ]
 
     return {
         "count": len(images),
-        "images": [
-            {
-                "id": img.id,
-                "current_filename": img.current_filename,
-                "file_path": img.file_path,
-                "media_type": img.media_type.value,
-                "ai_description": img.ai_description,
-                "ai_tags": img.ai_tags,
-                "created_at": img.created_at.isoformat() if img.created_at else None,
-            }
-            for img in images
-        ],
+        "images": images,
     }
 
 
@@ -2425,6 +2452,7 @@ async def sync_project_to_nextcloud(
                 {
                     "image_id": r.image_id,
                     "success": r.success,
+                    "status": r.status,
                     "nextcloud_path": r.nextcloud_path,
                     "error": r.error,
                 }
@@ -2455,18 +2483,21 @@ async def sync_batch_to_nextcloud(
         sync_service = NextcloudSyncService(db, nextcloud_client)
         results = await sync_service.sync_batch(image_ids, force=force)
 
-        succeeded = sum(1 for r in results if r.success)
-        failed = sum(1 for r in results if not r.success)
+        succeeded = sum(1 for r in results if r.status is SyncStatus.SYNCED)
+        skipped = sum(1 for r in results if r.status is SyncStatus.SKIPPED)
+        failed = sum(1 for r in results if r.status is SyncStatus.FAILED)
 
         return {
             "success": True,
             "total": len(image_ids),
             "synced": succeeded,
             "failed": failed,
+            "skipped": skipped,
             "results": [
                 {
                     "image_id": r.image_id,
                     "success": r.success,
+                    "status": r.status,
                     "nextcloud_path": r.nextcloud_path,
                     "error": r.error,
                 }
@@ -0,0 +1,142 @@
+"""
+Tests for rename engine
+"""
+from app.services import rename_engine
+from app.services.rename_engine import RenameEngine
+
+
+def _make_files(directory, count):
+    """Create count small files and return their paths"""
+    paths = []
+    for i in range(count):
+        path = directory / f"file_{i:03d}.jpg"
+        path.write_bytes(b"data")
+        paths.append(path)
+    return paths
+
+
+def test_batch_rename_concurrent(tmp_path):
+    """Test independent renames all succeed and keep input order"""
+    paths = _make_files(tmp_path, 50)
+    specs = [
+        {'file_path': str(path), 'new_filename': f"renamed_{path.name}"}
+        for path in paths
+    ]
+
+    engine = RenameEngine()
+    summary = engine.apply_batch_rename(specs, create_backups=False)
+
+    assert summary['succeeded'] == 50
+    assert summary['failed'] == 0
+    assert [r['old_path'] for r in summary['results']] == [str(p) for p in paths]
+    assert all((tmp_path / f"renamed_{p.name}").exists() for p in paths)
+
+
+def test_batch_rename_stop_on_error(tmp_path):
+    """Test stop_on_error stops before any later rename runs"""
+    paths = _make_files(tmp_path, 100)
+    specs = [{'file_path': str(tmp_path / "missing.jpg"), 'new_filename': "gone.jpg"}]
+    specs += [
+        {'file_path': str(path), 'new_filename': f"renamed_{path.name}"}
+        for path in paths
+    ]
+
+    engine = RenameEngine()
+    summary = engine.apply_batch_rename(specs, create_backups=False, stop_on_error=True)
+
+    assert summary['total'] == 101
+    assert summary['succeeded'] == 0
+    assert summary['failed'] == 1
+    assert len(summary['results']) == 1
+    assert all(path.exists() for path in paths)
+    assert not any(tmp_path.glob("renamed_*"))
+
+
+def test_backup_is_hardlink(tmp_path):
+    """Test the backup shares the original's inode instead of copying"""
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(b"original")
+
+    result = RenameEngine().apply_rename(str(path), "renamed.jpg")
+
+    assert result['success']
+    backup = tmp_path / ".backup_photo.jpg"
+    assert result['backup_path'] == str(backup)
+    assert backup.stat().st_ino == (tmp_path / "renamed.jpg").stat().st_ino
+    assert backup.read_bytes() == b"original"
+
+
+def test_backup_falls_back_to_copy(tmp_path, monkeypatch):
+    """Test the backup is copied when a hardlink cannot be made"""
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(b"original")
+
+    def no_link(*args, **kwargs):
+        raise OSError("hardlinks not supported")
+
+    monkeypatch.setattr(rename_engine.os, "link", no_link)
+    result = RenameEngine().apply_rename(str(path), "renamed.jpg")
+
+    assert result['success']
+    backup = tmp_path / ".backup_photo.jpg"
+    assert backup.stat().st_ino != (tmp_path / "renamed.jpg").stat().st_ino
+    assert backup.read_bytes() == b"original"
+
+
+def test_backup_replaces_stale_backup(tmp_path):
+    """Test a leftover backup is overwritten with the current content"""
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(b"current")
+    (tmp_path / ".backup_photo.jpg").write_bytes(b"stale")
+
+    result = RenameEngine().apply_rename(str(path), "renamed.jpg")
+
+    assert result['success']
+    assert (tmp_path / ".backup_photo.jpg").read_bytes() == b"current"
+
+
+def test_stale_hardlinked_backup_keeps_earlier_file(tmp_path):
+    """Test a leftover hardlinked backup never overwrites the file it links to"""
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(b"first photo")
+    engine = RenameEngine()
+    assert engine.apply_rename(str(path), "kept.jpg")['success']
+
+    path.write_bytes(b"second photo")
+    assert engine.apply_rename(str(path), "other.jpg")['success']
+
+    assert (tmp_path / "kept.jpg").read_bytes() == b"first photo"
+    assert (tmp_path / "other.jpg").read_bytes() == b"second photo"
+    assert (tmp_path / ".backup_photo.jpg").read_bytes() == b"second photo"
+
+
+def test_rollback_from_hardlinked_backup(tmp_path):
+    """Test rollback restores the original name and content from a hardlink"""
+    paths = _make_files(tmp_path, 3)
+    specs = [
+        {'file_path': str(path), 'new_filename': f"renamed_{path.name}"}
+        for path in paths
+    ]
+
+    engine = RenameEngine()
+    summary = engine.apply_batch_rename(specs)
+    rollback = engine.rollback(summary['results'])
+
+    assert rollback['succeeded'] == 3
+    assert rollback['failed'] == 0
+    assert all(path.read_bytes() == b"data" for path in paths)
+    assert not any(tmp_path.glob("renamed_*"))
+    assert not any(tmp_path.glob(".backup_*"))
+
+
+def test_cleanup_backups(tmp_path):
+    """Test cleanup removes only backups and tolerates a missing directory"""
+    (tmp_path / ".backup_a.jpg").write_bytes(b"a")
+    (tmp_path / ".backup_b.jpg").write_bytes(b"b")
+    (tmp_path / "keep.jpg").write_bytes(b"c")
+
+    engine = RenameEngine()
+
+    assert engine.cleanup_backups(str(tmp_path)) == 2
+    assert [p.name for p in tmp_path.iterdir()] == ["keep.jpg"]
+    assert engine.cleanup_backups(str(tmp_path / "missing")) == 0
@@ -0,0 +1,220 @@
+"""
+Tests for storage layout helpers
+"""
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import orjson
+import pytest
+from pydantic import ValidationError
+
+from app.config import Settings
+from app.services.rename_engine import RenameEngine
+from app.storage import layout
+from app.storage.layout import StorageManager, _HashCache
+
+CREATED_AT = datetime(2024, 5, 1)
+
+
+def _manifest_files(manifest_path):
+    """Return {asset_id: {filename: digest}} from a manifest"""
+    manifest = orjson.loads(manifest_path.read_bytes())
+    return {asset['asset_id']: asset['files'] for asset in manifest['assets']}
+
+
+def test_hash_cache_hit(tmp_path):
+    """Test an unchanged file is served from the cache"""
+    file_path = tmp_path / "asset.jpg"
+    file_path.write_bytes(b"original")
+
+    cache = _HashCache(tmp_path / ".hashcache.json")
+    cache.put(file_path, file_path.stat(), "sha256", "abc")
+
+    assert cache.get(file_path, file_path.stat(), "sha256") == "abc"
+    assert cache.get(file_path, file_path.stat(), "blake2b") is None
+
+
+def test_hash_cache_miss_after_change(tmp_path):
+    """Test a change to mtime, size or inode invalidates the entry"""
+    file_path = tmp_path / "asset.jpg"
+    file_path.write_bytes(b"original")
+    cache = _HashCache(tmp_path / ".hashcache.json")
+
+    stat = file_path.stat()
+    cache.put(file_path, stat, "sha256", "abc")
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.get(file_path, file_path.stat(), "sha256") is None
+
+    stat = file_path.stat()
+    cache.put(file_path, stat, "sha256", "abc")
+    file_path.write_bytes(b"changed content")
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert cache.get(file_path, file_path.stat(), "sha256") is None
+
+    stat = file_path.stat()
+    cache.put(file_path, stat, "sha256", "abc")
+    replacement = tmp_path / "replacement.jpg"
+    replacement.write_bytes(b"changed content")
+    os.utime(replacement, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(replacement, file_path)
+    assert file_path.stat().st_ino != stat.st_ino
+    assert cache.get(file_path, file_path.stat(), "sha256") is None
+
+
+def test_hash_cache_prune(tmp_path):
+    """Test prune only drops missing files under the given folder"""
+    folder = tmp_path / "project"
+    folder.mkdir()
+    kept = folder / "kept.jpg"
+    removed = folder / "removed.jpg"
+    outside = tmp_path / "other.jpg"
+    for file_path in (kept, removed, outside):
+        file_path.write_bytes(b"data")
+
+    cache = _HashCache(tmp_path / ".hashcache.json")
+    for file_path in (kept, removed, outside):
+        cache.put(file_path, file_path.stat(), "sha256", file_path.name)
+    cache.prune(folder, [kept])
+
+    assert set(cache.entries) == {str(kept), str(outside)}
+
+
+def test_hash_cache_save_roundtrip(tmp_path):
+    """Test saved entries are loaded again and no temporary files are left"""
+    file_path = tmp_path / "asset.jpg"
+    file_path.write_bytes(b"data")
+    cache_path = tmp_path / "metadata" / ".hashcache.json"
+
+    cache = _HashCache(cache_path)
+    cache.put(file_path, file_path.stat(), "sha256", "abc")
+    cache.save()
+
+    reloaded = _HashCache(cache_path)
+    assert reloaded.get(file_path, file_path.stat(), "sha256") == "abc"
+    assert os.listdir(cache_path.parent) == [".hashcache.json"]
+
+
+def test_write_without_manifests_records_nothing(tmp_path, monkeypatch):
+    """Test writes neither hash nor cache digests while manifests are disabled"""
+    monkeypatch.setattr(layout.settings, "enable_manifest_generation", False)
+    manager = StorageManager(root=str(tmp_path))
+    path = manager.write_file("originals", "asset-1", "photo.jpg", b"data", CREATED_AT, "acme")
+    manager.copy_file(path, "working", "asset-1", "photo.jpg", CREATED_AT, "acme")
+
+    assert manager._get_hash_cache().entries == {}
+
+
+def test_write_then_manifest_without_rehash(tmp_path, monkeypatch):
+    """Test generate_manifest reuses the digest recorded by write_file"""
+    monkeypatch.setattr(layout.settings, "enable_manifest_generation", True)
+    manager = StorageManager(root=str(tmp_path))
+    data = b"x" * 4096
+    path = manager.write_file("originals", "asset-1", "photo.jpg", data, CREATED_AT, "acme")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("file was hashed again")
+
+    monkeypatch.setattr(layout, "_hash_file", fail)
+    manifest_path = manager.generate_manifest("originals", 2024, "acme", include_metadata=False)
+
+    assert _manifest_files(manifest_path) == {
+        "asset-1": {"photo.jpg": hashlib.sha256(data).hexdigest()}
+    }
+    assert os.listdir(path.parent) == ["photo.jpg"]
+
+
+def test_manifest_records_algorithm(tmp_path, monkeypatch):
+    """Test the manifest names the hash algorithm its digests use"""
+    monkeypatch.setattr(layout.settings, "manifest_hash_algorithm", "blake2b")
+    manager = StorageManager(root=str(tmp_path))
+    manager.write_file("originals", "asset-1", "photo.jpg", b"data", CREATED_AT, "acme")
+
+    manifest_path = manager.generate_manifest("originals", 2024, "acme", include_metadata=False)
+    manifest = orjson.loads(manifest_path.read_bytes())
+
+    assert manifest["algorithm"] == "blake2b"
+    assert manifest["assets"][0]["files"]["photo.jpg"] == hashlib.blake2b(b"data").hexdigest()
+
+
+@pytest.mark.parametrize("algorithm", ["sha265", "shake_128", ""])
+def test_invalid_hash_algorithm_rejected(algorithm):
+    """Test unknown and variable-length algorithms fail at configuration time"""
+    with pytest.raises(ValidationError):
+        Settings(manifest_hash_algorithm=algorithm)
+
+
+def test_manifest_rehashes_modified_file(tmp_path):
+    """Test a file changed after write_file is hashed again"""
+    manager = StorageManager(root=str(tmp_path))
+    path = manager.write_file("originals", "asset-1", "photo.jpg", b"before", CREATED_AT, "acme")
+    path.write_bytes(b"modified after writing")
+
+    manifest_path = manager.generate_manifest("originals", 2024, "acme", include_metadata=False)
+
+    assert _manifest_files(manifest_path)["asset-1"] == {
+        "photo.jpg": hashlib.sha256(b"modified after writing").hexdigest()
+    }
+
+
+def test_manifest_after_rename(tmp_path):
+    """Test a renamed working file is listed under its new name only"""
+    manager = StorageManager(root=str(tmp_path))
+    path = manager.write_file("working", "asset-1", "photo.jpg", b"data", CREATED_AT, "acme")
+
+    result = RenameEngine().apply_rename(str(path), "renamed.jpg", create_backup=False)
+    assert result['success']
+
+    manifest_path = manager.generate_manifest("working", 2024, "acme", include_metadata=False)
+
+    assert _manifest_files(manifest_path) == {
+        "asset-1": {"renamed.jpg": hashlib.sha256(b"data").hexdigest()}
+    }
+    assert str(path) not in manager._get_hash_cache().entries
+
+
+def test_atomic_writes_from_threads(tmp_path):
+    """Test concurrent atomic writes to one file never share a temporary file"""
+    manager = StorageManager(root=str(tmp_path))
+    payloads = [bytes([i]) * 65536 for i in range(16)]
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        paths = list(executor.map(
+            lambda data: manager.write_file(
+                "metadata", "asset-1", "metadata.json", data, CREATED_AT, "acme", atomic=True
+            ),
+            payloads,
+        ))
+
+    path = paths[0]
+    assert path.read_bytes() in payloads
+    assert os.listdir(path.parent) == ["metadata.json"]
+
+
+def test_metadata_rewrite_same_size_and_mtime(tmp_path):
+    """Test a same-size metadata rewrite in the same timestamp tick is read fresh"""
+    manager = StorageManager(root=str(tmp_path))
+    path = manager.write_metadata("asset-1", {"published": "no"}, CREATED_AT, "acme", fsync=False)
+    stat = path.stat()
+    assert manager.read_metadata("asset-1", 2024, "acme") == {"published": "no"}
+
+    manager.write_metadata("asset-1", {"published": "ok"}, CREATED_AT, "acme", fsync=False)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert path.stat().st_size == stat.st_size
+
+    assert manager.read_metadata("asset-1", 2024, "acme") == {"published": "ok"}
+
+
+@pytest.mark.parametrize("atomic", [False, True])
+def test_write_file_mode_follows_umask(tmp_path, atomic):
+    """Test written files get the mode open() would give them under the umask"""
+    umask = os.umask(0)
+    os.umask(umask)
+    manager = StorageManager(root=str(tmp_path))
+
+    path = manager.write_file(
+        "originals", "asset-1", "photo.jpg", b"data", CREATED_AT, "acme", atomic=atomic
+    )
+
+    assert path.stat().st_mode & 0o777 == 0o666 & ~umask
@@ -60,6 +60,22 @@ def test_template_validation():
     assert not is_valid
 
 
+def test_validation_rejects_only_file_variables():
+    """Templates that can only render file variables may produce no filename"""
+    for template in ("{file_size}", "{created_date}_{modified_date}", "_{file_size_kb}-"):
+        is_valid, msg = TemplateParser.validate_template(template)
+        assert not is_valid, template
+        assert msg == "Template produces empty filename"
+
+    # Literal text or any other variable keeps the filename non-empty
+    for template in ("img_{file_size}", "{file_size}_{index}", "photo"):
+        is_valid, msg = TemplateParser.validate_template(template)
+        assert is_valid, f"{template}: {msg}"
+
+    is_valid, msg = TemplateParser.validate_template("_-_")
+    assert not is_valid
+
+
 def test_sanitization():
     """Test filename sanitization"""
     parser = TemplateParser("{description}")
@@ -263,5 +279,40 @@ def test_all_new_variables_validation():
         assert is_valid, f"Variable {var} should be valid but got error: {msg}"
 
 
+def test_apply_many_matches_apply():
+    """Batch application should match per-item apply with the same time"""
+    from datetime import datetime
+    parser = TemplateParser("{description}_{date}_{time}_{index}")
+    test_time = datetime(2025, 11, 7, 14, 30, 45)
+
+    items = [
+        {'description': 'First image', 'original_filename': 'a.jpg'},
+        {'description': 'Second image', 'original_filename': 'b.jpg'},
+    ]
+
+    results = parser.apply_many(items, start_index=5, now=test_time)
+
+    assert results == [
+        parser.apply(item, index=i, current_time=test_time)
+        for i, item in enumerate(items, start=5)
+    ]
+    assert results[0] == 'first_image_20251107_143045_005'
+
+
+def test_apply_many_large_batch_matches_apply():
+    """Large batches use a specialized build function with identical output"""
+    from datetime import datetime
+    parser = TemplateParser("{description}_{date}_{hour}_{index}")
+    test_time = datetime(2025, 11, 7, 14, 30, 45)
+
+    items = [{'description': f'Image {i}'} for i in range(40)]
+    results = parser.apply_many(iter(items), now=test_time)
+
+    assert results == [
+        parser.apply(item, index=i, current_time=test_time)
+        for i, item in enumerate(items, start=1)
+    ]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])